@@ -1 +1 @@
-uv run python src/main.py "/ssg/"
+uv run python src/ssg.py "/ssg/"
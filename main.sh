@@ -1,2 +1,2 @@
-uv run python src/main.py
+uv run python src/ssg.py
 cd public && uv run python -m http.server 8888
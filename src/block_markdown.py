@@ -1,10 +1,16 @@
 import re
+from collections.abc import Iterable
 from enum import Enum
 
-from htmlnode import LeafNode, ParentNode
+import metrics
+from document import DocNode, to_html_node
+from htmlnode import ParentNode
 from inline_markdown import text_to_textnodes
 from textnode import TextType
 
+_HEADING_RE = re.compile(r"^#{1,6} ")
+_CODE_RE = re.compile(r"^`{3,}.*`{3,}$", re.DOTALL)
+
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -13,23 +19,104 @@ class BlockType(Enum):
     QUOTE = "quote"
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
+    TABLE = "table"
+
+
+def _list_item(line: str) -> tuple[int, str, str] | None:
+    """Split a list line into its indent, list tag and content, or None.
+
+    Scans the line once with string methods instead of a regex, so list
+    detection stays linear in the block size.
+    """
+    content = line.lstrip(" ")
+    indent = len(line) - len(content)
+    if content.startswith("- "):
+        return indent, "ul", content[2:]
+    digits = 0
+    while digits < len(content) and content[digits].isdigit():
+        digits += 1
+    if digits and content.startswith(". ", digits):
+        return indent, "ol", content[digits + 2 :]
+    return None
+
+
+def _list_block_type(lines: list[str]) -> BlockType | None:
+    items = [_list_item(line) for line in lines]
+    if not items or None in items or items[0][0] != 0:
+        return None
+    # nested items may mix list kinds, top level items may not
+    top_level_tags = {tag for indent, tag, _ in items if indent == 0}
+    if top_level_tags == {"ul"}:
+        return BlockType.UNORDERED_LIST
+    if top_level_tags == {"ol"}:
+        return BlockType.ORDERED_LIST
+    return None
+
+
+def _split_table_row(line: str) -> list[str]:
+    line = line.strip()
+    line = line.removeprefix("|")
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    cells = []
+    cell = []
+    i = 0
+    while i < len(line):
+        if line[i] == "\\" and line.startswith("|", i + 1):
+            cell.append("|")
+            i += 2
+            continue
+        if line[i] == "|":
+            cells.append("".join(cell).strip())
+            cell = []
+        else:
+            cell.append(line[i])
+        i += 1
+    cells.append("".join(cell).strip())
+    return cells
+
+
+def _table_alignments(line: str) -> list[str | None] | None:
+    """Parse a delimiter row such as ``| :-- | :-: | --: |``, or return None."""
+    alignments = []
+    for cell in _split_table_row(line):
+        if not cell.strip(":") or cell.strip(":").strip("-"):
+            return None
+        if cell.startswith(":") and cell.endswith(":"):
+            alignments.append("center")
+        elif cell.endswith(":"):
+            alignments.append("right")
+        elif cell.startswith(":"):
+            alignments.append("left")
+        else:
+            alignments.append(None)
+    return alignments
+
+
+def _is_table(lines: list[str]) -> bool:
+    return (
+        len(lines) >= 2
+        and all(line.lstrip().startswith("|") for line in lines)
+        and _table_alignments(lines[1]) is not None
+        and len(_split_table_row(lines[0])) == len(_table_alignments(lines[1]))
+    )
 
 
 def block_to_block_type(block: str) -> BlockType:
-    if re.match(r"^#{1,6} ", block):
+    if _HEADING_RE.match(block):
         return BlockType.HEADING
 
-    elif re.match(r"^`{3,}.*`{3,}$", block, re.DOTALL):
+    elif _CODE_RE.match(block):
         return BlockType.CODE
 
     elif all(line.startswith(">") for line in block.splitlines()):
         return BlockType.QUOTE
 
-    elif all(line.startswith("- ") for line in block.splitlines()):
-        return BlockType.UNORDERED_LIST
+    elif _is_table(block.splitlines()):
+        return BlockType.TABLE
 
-    elif all(re.match(r"^\d+\. ", line) for line in block.splitlines()):
-        return BlockType.ORDERED_LIST
+    elif list_block_type := _list_block_type(block.splitlines()):
+        return list_block_type
 
     else:
         return BlockType.PARAGRAPH
@@ -49,136 +136,137 @@ def markdown_to_blocks(markdown_text: str) -> list[str]:
     return blocks
 
 
-# def text_to_children(text: str) -> list[HTMLNode]:
-
-
-def paragraph_md_to_html_node(paragraph: str) -> list[LeafNode]:
-    # splitting down to leaf nodes should be done here
-    paragraph = paragraph.replace("\n", " ")
-    text_nodes = text_to_textnodes(paragraph)
-
-    html_nodes = []
-    for text_node in text_nodes:
+def text_to_doc_nodes(text: str) -> tuple[DocNode, ...]:
+    nodes = []
+    for text_node in text_to_textnodes(text):
         if text_node.text_type == TextType.TEXT:
-            html_nodes.append(LeafNode(tag=None, value=text_node.text))
+            nodes.append((None, text_node.text, None, None))
         elif text_node.text_type == TextType.BOLD:
-            html_nodes.append(LeafNode(tag="b", value=text_node.text))
+            nodes.append(("b", text_node.text, None, None))
         elif text_node.text_type == TextType.ITALIC:
-            html_nodes.append(LeafNode(tag="i", value=text_node.text))
+            nodes.append(("i", text_node.text, None, None))
         elif text_node.text_type == TextType.CODE:
-            html_nodes.append(LeafNode(tag="code", value=text_node.text))
+            nodes.append(("code", text_node.text, None, None))
         elif text_node.text_type == TextType.IMAGE:
-            html_nodes.append(
-                LeafNode(
-                    tag="img",
-                    value=" ",
-                    props={"src": text_node.url, "alt": text_node.text},
-                )
-            )
+            props = {"src": text_node.url, "alt": text_node.text}
+            nodes.append(("img", " ", props, None))
         elif text_node.text_type == TextType.LINK:
-            html_nodes.append(
-                LeafNode(tag="a", value=text_node.text, props={"href": text_node.url})
-            )
+            nodes.append(("a", text_node.text, {"href": text_node.url}, None))
         else:
             raise ValueError(f"Invalid text type: {text_node.text_type}")
+    return tuple(nodes)
 
-    return html_nodes
 
+def paragraph_md_to_doc_node(paragraph: str) -> DocNode:
+    return ("p", None, None, text_to_doc_nodes(paragraph.replace("\n", " ")))
 
-def heading_md_to_html_node(heading: str) -> LeafNode:
-    heading_level = heading.count("#")
 
+def heading_md_to_doc_node(heading: str) -> DocNode:
+    heading_level = heading.count("#")
     content = heading.strip("#").strip()
+    return (f"h{heading_level}", content, None, None)
 
-    return LeafNode(
-        tag=f"h{heading_level}",
-        value=content,
-    )
 
-
-def code_md_to_html_node(code: str) -> ParentNode:
+def code_md_to_doc_node(code: str) -> DocNode:
     code = code.strip("`").lstrip()
-
-    return ParentNode(
-        tag="pre",
-        children=[LeafNode(tag="code", value=code)],
-    )
+    return ("pre", None, None, (("code", code, None, None),))
 
 
-def quote_md_to_html_node(quote: str) -> ParentNode:
+def quote_md_to_doc_node(quote: str) -> DocNode:
     lines = quote.splitlines()
     stripped_lines = [line.lstrip(">").strip() for line in lines]
-    content = " ".join(stripped_lines)
-    return LeafNode(
-        tag="blockquote",
-        value=content,
-    )
-
-
-def unordered_list_md_to_html_nodes(unordered_list: str) -> list[LeafNode]:
-    lines = unordered_list.splitlines()
-
-    list_item_nodes = []
-
-    for line in lines:
-        processed_line = paragraph_md_to_html_node(line.strip("- ").strip())
-        list_item_nodes.append(
-            ParentNode(
-                tag="li",
-                children=processed_line,
-            )
-        )
-
-    return ParentNode(
-        tag="ul",
-        children=list_item_nodes,
-    )
-
-
-def ordered_list_md_to_html_nodes(ordered_list: str) -> list[LeafNode]:
-    lines = ordered_list.splitlines()
-
-    list_item_nodes = []
-
-    for line in lines:
-        processed_line = paragraph_md_to_html_node(line.split(".", 1)[1].strip())
-        list_item_nodes.append(
-            ParentNode(
-                tag="li",
-                children=processed_line,
-            )
+    return ("blockquote", " ".join(stripped_lines), None, None)
+
+
+def list_md_to_doc_node(list_block: str) -> DocNode:
+    """Build a list, nesting items by indentation, in a single pass over the lines."""
+    # open lists from the outermost in: indent, tag and the children of each item
+    stack: list[tuple[int, str, list[list[DocNode]]]] = []
+
+    def close() -> DocNode:
+        _, tag, items = stack.pop()
+        node = (tag, None, None, tuple(("li", None, None, tuple(i)) for i in items))
+        if stack:
+            # a nested list belongs to the last item of the list around it
+            stack[-1][2][-1].append(node)
+        return node
+
+    for line in list_block.splitlines():
+        indent, tag, content = _list_item(line)
+
+        # close deeper lists, and a same-level list of a different kind
+        while len(stack) > 1 and (
+            indent < stack[-1][0] or (indent == stack[-1][0] and tag != stack[-1][1])
+        ):
+            close()
+        if not stack or indent > stack[-1][0]:
+            stack.append((indent, tag, []))
+
+        stack[-1][2].append(list(text_to_doc_nodes(content.strip())))
+
+    while len(stack) > 1:
+        close()
+    return close()
+
+
+def table_md_to_doc_node(table: str) -> DocNode:
+    lines = table.splitlines()
+    alignments = _table_alignments(lines[1])
+
+    def row_to_doc_node(line: str, cell_tag: str) -> DocNode:
+        # like GFM, rows are padded or cut to the header's width
+        cells = _split_table_row(line)[: len(alignments)]
+        cells += [""] * (len(alignments) - len(cells))
+        return (
+            "tr",
+            None,
+            None,
+            tuple(
+                (
+                    cell_tag,
+                    None,
+                    {"align": alignment} if alignment else None,
+                    text_to_doc_nodes(cell),
+                )
+                for cell, alignment in zip(cells, alignments)
+            ),
         )
 
-    return ParentNode(
-        tag="ol",
-        children=list_item_nodes,
-    )
+    children = [("thead", None, None, (row_to_doc_node(lines[0], "th"),))]
+    if len(lines) > 2:
+        rows = tuple(row_to_doc_node(line, "td") for line in lines[2:])
+        children.append(("tbody", None, None, rows))
+    return ("table", None, None, tuple(children))
 
 
-def markdown_to_html_node(markdown: str):
-    blocks = markdown_to_blocks(markdown)
-    html_nodes = []
+def blocks_to_document(blocks: Iterable[str]) -> DocNode:
+    doc_nodes = []
     for block in blocks:
         block_type = block_to_block_type(block)
+        metrics.incr("blocks_parsed", type=block_type.value)
 
         match block_type:
             case BlockType.PARAGRAPH:
-                children = paragraph_md_to_html_node(block)
-                html_node = ParentNode(tag="p", children=children)
+                doc_node = paragraph_md_to_doc_node(block)
             case BlockType.HEADING:
-                html_node = heading_md_to_html_node(block)
+                doc_node = heading_md_to_doc_node(block)
             case BlockType.CODE:
-                html_node = code_md_to_html_node(block)
+                doc_node = code_md_to_doc_node(block)
             case BlockType.QUOTE:
-                html_node = quote_md_to_html_node(block)
-            case BlockType.UNORDERED_LIST:
-                html_node = unordered_list_md_to_html_nodes(block)
-            case BlockType.ORDERED_LIST:
-                html_node = ordered_list_md_to_html_nodes(block)
+                doc_node = quote_md_to_doc_node(block)
+            case BlockType.UNORDERED_LIST | BlockType.ORDERED_LIST:
+                doc_node = list_md_to_doc_node(block)
+            case BlockType.TABLE:
+                doc_node = table_md_to_doc_node(block)
 
-        html_nodes.append(html_node)
+        doc_nodes.append(doc_node)
 
-    return ParentNode(
-        tag="div",
-        children=html_nodes,
-    )
+    return ("div", None, None, tuple(doc_nodes))
+
+
+def markdown_to_document(markdown: str) -> DocNode:
+    return blocks_to_document(markdown_to_blocks(markdown))
+
+
+def markdown_to_html_node(markdown: str) -> ParentNode:
+    return to_html_node(markdown_to_document(markdown))
@@ -0,0 +1,269 @@
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+from dependencies import DependencyIndex
+from digest import digest_key, stamp_mtimes, stamp_rebuilt, update_digest, write_digest
+from main import (
+    DOCS_DIR,
+    ROOT_DIR,
+    STATIC_DIR,
+    BuildTarget,
+    apply_basepath,
+    apply_template,
+    copy_static,
+    find_pages,
+    load_template,
+    parse_target,
+    write_page,
+)
+from publish import publish, start_staging
+from render import render_source
+
+DEFAULT_SOCKET = ROOT_DIR / ".ssg.sock"
+
+
+class SiteModel:
+    """Rendered content of every page, kept in memory between rebuilds.
+
+    Each page is stored as its title and content HTML, so a template change
+    only re-wraps pages and a content change only re-parses that page. The
+    files each page was built from are tracked, so a change to a template or
+    partial rewrites only the pages that use it.
+    """
+
+    def __init__(
+        self,
+        content_dir: Path,
+        template_path: Path,
+        targets: list[BuildTarget],
+        static_dir: Path = STATIC_DIR,
+    ):
+        self.content_dir = content_dir.resolve()
+        self.template_path = template_path.resolve()
+        self.static_dir = static_dir.resolve()
+        self.targets = targets
+        self.partials_dir = self.template_path.parent / "partials"
+        self.html_template = ""
+        self.template_inputs: list[Path] = []
+        self.pages: dict[Path, tuple[str, str]] = {}
+        self.dependencies = DependencyIndex()
+        self.lock = threading.Lock()
+
+    def load(self) -> list[Path]:
+        """Parse every page and publish a full build of each target.
+
+        Each build is written to a staging dir, with its digest and mtimes as
+        ``main.py`` gives them, and swapped into place once complete, reusing
+        unchanged files of the previous output.
+        """
+        with self.lock:
+            self._load_template()
+            self.pages = {}
+            self.dependencies = DependencyIndex()
+            for from_path in find_pages(self.content_dir):
+                self._parse(from_path.resolve())
+
+            written = []
+            for target in self.targets:
+                staging = start_staging(target.output_dir)
+                if self.static_dir.exists():
+                    copy_static(staging, self.static_dir, target.output_dir)
+                for from_path, (title, content) in self.pages.items():
+                    rel_path = self._rel_path(from_path)
+                    page = apply_template(self.html_template, title, content)
+                    write_page(
+                        apply_basepath(page, target.basepath),
+                        staging / rel_path,
+                        target.output_dir / rel_path,
+                    )
+                    written.append(target.output_dir / rel_path)
+                write_digest(staging, digest_key())
+                stamp_mtimes(staging, target.output_dir)
+                publish(staging, target.output_dir)
+            return written
+
+    def rebuild(self, paths: list[Path]) -> list[Path]:
+        """Rebuild the outputs of changed, added or deleted files.
+
+        Every path is checked, and the template and pages are read and parsed,
+        before anything is changed, so a bad request leaves the model and the
+        output as they were. Each target's digest is updated afterwards.
+        """
+        with self.lock:
+            template_paths = []
+            parse_paths = []
+            removed_paths = []
+            static_paths = []
+            removed_static_paths = []
+            for path in (Path(path).resolve() for path in paths):
+                if path == self.template_path or path.is_relative_to(self.partials_dir):
+                    template_paths.append(path)
+                elif path.is_relative_to(self.content_dir) and path.suffix == ".md":
+                    (parse_paths if path.exists() else removed_paths).append(path)
+                elif path.is_relative_to(self.static_dir) and path.is_file():
+                    static_paths.append(path)
+                elif path.is_relative_to(self.static_dir) and not path.exists():
+                    removed_static_paths.append(path)
+                else:
+                    raise ValueError(f"Path is not part of the site: {path}")
+
+            if template_paths:
+                html_template, template_inputs = load_template(self.template_path)
+            parsed = {path: render_source(path) for path in parse_paths}
+
+            # unused partials affect no pages, but may be included now
+            changed = self.dependencies.affected(template_paths) | set(parsed)
+            if template_paths:
+                self.html_template = html_template
+                self.template_inputs = [path.resolve() for path in template_inputs]
+                for from_path in self.pages:
+                    self._record(from_path)
+            for from_path, page in parsed.items():
+                self.pages[from_path] = page
+                self._record(from_path)
+            removed = []
+            for from_path in removed_paths:
+                self.pages.pop(from_path, None)
+                self.dependencies.forget(from_path)
+                changed.discard(from_path)
+                removed.extend(self._output_paths(from_path))
+            for path in removed_static_paths:
+                for target in self.targets:
+                    removed.append(
+                        target.output_dir / path.relative_to(self.static_dir)
+                    )
+            for to_path in removed:
+                to_path.unlink(missing_ok=True)
+
+            written = []
+            for path in static_paths:
+                written.extend(self._copy_static_file(path))
+            written += self._write(sorted(changed))
+            stamp_rebuilt(written)
+            for target in self.targets:
+                update_digest(
+                    target.output_dir,
+                    [
+                        path
+                        for path in written + removed
+                        if path.is_relative_to(target.output_dir)
+                    ],
+                    digest_key(),
+                )
+            return written
+
+    def _load_template(self):
+        html_template, inputs = load_template(self.template_path)
+        self.html_template = html_template
+        self.template_inputs = [path.resolve() for path in inputs]
+        for from_path in self.pages:
+            self._record(from_path)
+
+    def _parse(self, from_path: Path):
+        self.pages[from_path] = render_source(from_path)
+        self._record(from_path)
+
+    def _record(self, from_path: Path):
+        self.dependencies.record(from_path, [from_path, *self.template_inputs])
+
+    def _rel_path(self, from_path: Path) -> Path:
+        return from_path.relative_to(self.content_dir).with_suffix(".html")
+
+    def _output_paths(self, from_path: Path) -> list[Path]:
+        return [
+            target.output_dir / self._rel_path(from_path) for target in self.targets
+        ]
+
+    def _write(self, from_paths: list[Path]) -> list[Path]:
+        written = []
+        for from_path in from_paths:
+            page = apply_template(self.html_template, *self.pages[from_path])
+            for target, to_path in zip(self.targets, self._output_paths(from_path)):
+                write_page(apply_basepath(page, target.basepath), to_path)
+                written.append(to_path)
+        return written
+
+    def _copy_static_file(self, path: Path) -> list[Path]:
+        written = []
+        for target in self.targets:
+            to_path = target.output_dir / path.relative_to(self.static_dir)
+            os.makedirs(to_path.parent, exist_ok=True)
+            # replaced rather than rewritten, the old file may be hard-linked
+            tmp_path = to_path.with_name(f".{to_path.name}.tmp")
+            tmp_path.write_bytes(path.read_bytes())
+            os.replace(tmp_path, to_path)
+            written.append(to_path)
+        return written
+
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    # One JSON object per line: {"paths": [...]} -> {"ok": ..., "written": [...], "ms": ...}
+    def handle(self):
+        for line in self.rfile:
+            start = time.perf_counter()
+            try:
+                paths = json.loads(line)["paths"]
+                written = self.server.site.rebuild(paths)
+                response = {"ok": True, "written": [str(path) for path in written]}
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            response["ms"] = (time.perf_counter() - start) * 1000
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class BuildServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, site: SiteModel):
+        if socket_path.exists():
+            socket_path.unlink()
+        self.site = site
+        super().__init__(str(socket_path), BuildRequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        Path(self.server_address).unlink(missing_ok=True)
+
+
+def request_rebuild(paths: list[Path], socket_path: Path = DEFAULT_SOCKET) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(socket_path))
+        request = {"paths": [str(Path(path).resolve()) for path in paths]}
+        client.sendall(json.dumps(request).encode() + b"\n")
+        with client.makefile("rb") as response:
+            return json.loads(response.readline())
+
+
+def main():
+    # build_server.py serve [target ...] | build_server.py rebuild path ...
+    if len(sys.argv) < 2 or sys.argv[1] not in ("serve", "rebuild"):
+        sys.exit("Usage: build_server.py serve [target ...] | rebuild path ...")
+
+    if sys.argv[1] == "rebuild":
+        response = request_rebuild([Path(arg) for arg in sys.argv[2:]])
+        if not response["ok"]:
+            sys.exit(response["error"])
+        print(f"Rebuilt {len(response['written'])} files in {response['ms']:.1f}ms")
+        return
+
+    targets = [parse_target(arg) for arg in sys.argv[2:]] or [
+        BuildTarget("/", DOCS_DIR)
+    ]
+    site = SiteModel(ROOT_DIR / "content", ROOT_DIR / "template.html", targets)
+    site.load()
+    with BuildServer(DEFAULT_SOCKET, site) as server:
+        print(f"Serving builds on {DEFAULT_SOCKET}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import json
+import sys
+from collections.abc import Iterable
+from pathlib import Path
+
+
+class DependencyIndex:
+    """The inputs each output was built from, and the reverse mapping.
+
+    Outputs and inputs are any hashable keys, usually paths. Recording an
+    output again replaces its previous inputs.
+    """
+
+    def __init__(self):
+        self.inputs: dict = {}
+        self.dependents: dict = {}
+
+    def record(self, output, inputs: Iterable):
+        self.forget(output)
+        self.inputs[output] = set(inputs)
+        for input_ in self.inputs[output]:
+            self.dependents.setdefault(input_, set()).add(output)
+
+    def forget(self, output):
+        for input_ in self.inputs.pop(output, ()):
+            self.dependents[input_].discard(output)
+            if not self.dependents[input_]:
+                del self.dependents[input_]
+
+    def affected(self, changed: Iterable) -> set:
+        return {
+            output for input_ in changed for output in self.dependents.get(input_, ())
+        }
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    str(output): sorted(str(input_) for input_ in inputs)
+                    for output, inputs in sorted(self.inputs.items())
+                },
+                f,
+                indent=2,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "DependencyIndex":
+        index = cls()
+        with open(path, "r") as f:
+            for output, inputs in json.load(f).items():
+                index.record(Path(output), (Path(input_) for input_ in inputs))
+        return index
+
+
+def main():
+    # dependencies.py index.json changed_path ... prints the outputs to rebuild
+    if len(sys.argv) < 3:
+        sys.exit("Usage: dependencies.py index.json changed_path ...")
+    index = DependencyIndex.load(Path(sys.argv[1]))
+    for output in sorted(index.affected(Path(arg).resolve() for arg in sys.argv[2:])):
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
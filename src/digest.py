@@ -0,0 +1,188 @@
+import filecmp
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+DIGEST_NAME = "build-digest.json"
+
+
+def source_date_epoch() -> int | None:
+    # https://reproducible-builds.org/specs/source-date-epoch/
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    return int(epoch) if epoch else None
+
+
+def _same_contents(path: Path, previous_path: Path) -> bool:
+    try:
+        if os.path.samefile(path, previous_path):
+            return True
+    except FileNotFoundError:
+        return False
+    return filecmp.cmp(path, previous_path, shallow=False)
+
+
+def _build_mtime_ns(epoch: int | None) -> int:
+    epoch = source_date_epoch() if epoch is None else epoch
+    return time.time_ns() if epoch is None else epoch * 1_000_000_000
+
+
+def stamp_mtimes(
+    output_dir: Path, previous_dir: Path | None = None, epoch: int | None = None
+):
+    """Give files identical to ``previous_dir``'s their previous mtime, and the
+    other files ``epoch``, ``SOURCE_DATE_EPOCH`` or the current time.
+
+    Unchanged files look unchanged to rsync and to size and mtime ETags, while
+    a changed file never keeps an old mtime, even at the same size.
+    """
+    mtime_ns = _build_mtime_ns(epoch)
+    for dirpath, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            previous_path = (
+                previous_dir / path.relative_to(output_dir) if previous_dir else None
+            )
+            if previous_path and _same_contents(path, previous_path):
+                previous = previous_path.stat()
+                os.utime(path, ns=(previous.st_atime_ns, previous.st_mtime_ns))
+            else:
+                os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def stamp_rebuilt(paths: list[Path], epoch: int | None = None):
+    """Give files rebuilt in place ``epoch``, ``SOURCE_DATE_EPOCH`` or the current
+    time, as ``stamp_mtimes`` does for changed files."""
+    mtime_ns = _build_mtime_ns(epoch)
+    for path in paths:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _sign(files: dict[str, str], key: bytes | None) -> str:
+    listing = json.dumps(files, sort_keys=True, separators=(",", ":")).encode()
+    if key is None:
+        return hashlib.sha256(listing).hexdigest()
+    return hmac.new(key, listing, hashlib.sha256).hexdigest()
+
+
+def digest_key() -> bytes | None:
+    key = os.environ.get("SSG_DIGEST_KEY")
+    return key.encode() if key else None
+
+
+def _file_sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _digest(files: dict[str, str], key: bytes | None) -> dict:
+    files = dict(sorted(files.items()))
+    return {
+        "algorithm": "hmac-sha256" if key else "sha256",
+        "signature": _sign(files, key),
+        "files": files,
+    }
+
+
+def build_digest(output_dir: Path, key: bytes | None = None) -> dict:
+    """Hash every file in ``output_dir`` and sign the listing.
+
+    With a key the signature is an HMAC-SHA256, without one it is a plain
+    SHA-256 of the listing that only guards against corruption.
+    """
+    files = {}
+    for dirpath, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            rel_path = path.relative_to(output_dir).as_posix()
+            if rel_path != DIGEST_NAME:
+                files[rel_path] = _file_sha256(path)
+    return _digest(files, key)
+
+
+def _save_digest(output_dir: Path, digest: dict) -> Path:
+    # replaced rather than rewritten, so a reader never sees half a digest
+    digest_path = output_dir / DIGEST_NAME
+    tmp_path = digest_path.with_name(f".{DIGEST_NAME}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(digest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, digest_path)
+    return digest_path
+
+
+def write_digest(output_dir: Path, key: bytes | None = None) -> Path:
+    return _save_digest(output_dir, build_digest(output_dir, key))
+
+
+def update_digest(
+    output_dir: Path, paths: list[Path], key: bytes | None = None
+) -> Path:
+    """Rehash ``paths`` in ``output_dir``'s digest, dropping the deleted ones.
+
+    Without a valid digest to update, every file is hashed.
+    """
+    try:
+        files = load_digest(output_dir / DIGEST_NAME, key)["files"]
+    except (FileNotFoundError, ValueError):
+        return write_digest(output_dir, key)
+    for path in paths:
+        rel_path = path.relative_to(output_dir).as_posix()
+        if path.is_file():
+            files[rel_path] = _file_sha256(path)
+        else:
+            files.pop(rel_path, None)
+    return _save_digest(output_dir, _digest(files, key))
+
+
+def load_digest(digest_path: Path, key: bytes | None = None) -> dict:
+    with open(digest_path, "r") as f:
+        digest = json.load(f)
+    signed = digest["algorithm"] == "hmac-sha256"
+    if signed != (key is not None):
+        raise ValueError(
+            f"Digest is {'signed' if signed else 'unsigned'} but a key was "
+            f"{'not ' if key is None else ''}given: {digest_path}"
+        )
+    expected = _sign(digest["files"], key)
+    if not hmac.compare_digest(digest["signature"], expected):
+        raise ValueError(f"Digest signature does not match: {digest_path}")
+    return digest
+
+
+def diff_digests(old: dict, new: dict) -> tuple[list[str], list[str]]:
+    """Return the files to upload and the files to delete to go from old to new."""
+    old_files, new_files = old["files"], new["files"]
+    changed = [
+        path for path, sha256 in new_files.items() if old_files.get(path) != sha256
+    ]
+    removed = [path for path in old_files if path not in new_files]
+    return changed, removed
+
+
+def main():
+    # digest.py verify output_dir | digest.py diff old_digest new_digest
+    key = digest_key()
+    if len(sys.argv) == 3 and sys.argv[1] == "verify":
+        output_dir = Path(sys.argv[2])
+        digest = load_digest(output_dir / DIGEST_NAME, key)
+        if digest["files"] != build_digest(output_dir, key)["files"]:
+            sys.exit(f"{output_dir} does not match its digest")
+        print(f"{output_dir} matches its digest")
+    elif len(sys.argv) == 4 and sys.argv[1] == "diff":
+        changed, removed = diff_digests(
+            load_digest(Path(sys.argv[2]), key), load_digest(Path(sys.argv[3]), key)
+        )
+        for path in changed:
+            print(f"+ {path}")
+        for path in removed:
+            print(f"- {path}")
+    else:
+        sys.exit("Usage: digest.py verify output_dir | diff old_digest new_digest")
+
+
+if __name__ == "__main__":
+    main()
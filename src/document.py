@@ -0,0 +1,103 @@
+import importlib
+import marshal
+from collections.abc import Callable
+
+from htmlnode import HTMLNode, LeafNode, ParentNode
+
+# A document node is a plain tuple, (tag, value, props, children):
+# leaves have children None, parents have value None and a tuple of children.
+# The block parser builds these directly and HTML is rendered from them, so
+# transforms run between the two without converting the tree. Plain builtins
+# also keep nodes small and let marshal serialize a whole document.
+DocNode = tuple[str | None, str | None, dict | None, tuple | None]
+Transform = Callable[[DocNode], DocNode | None]
+
+ANY_TAG = "*"
+
+
+def to_html(node: DocNode) -> str:
+    """Render a document the way ``HTMLNode.to_html`` renders the same tree."""
+    tag, value, props, children = node
+    props_html = "".join(f' {k}="{v}"' for k, v in props.items()) if props else ""
+    if children is not None:
+        content = "".join(to_html(child) for child in children)
+        return f"<{tag}{props_html}>{content}</{tag}>"
+    if value is None:
+        raise ValueError("Document leaf value cannot be None")
+    if not tag:
+        return value
+    if tag.lower() == "img":
+        return f"<{tag}{props_html}>"
+    return f"<{tag}{props_html}>{value}</{tag}>"
+
+
+def to_html_node(node: DocNode) -> HTMLNode:
+    tag, value, props, children = node
+    if children is None:
+        return LeafNode(tag, value, props)
+    return ParentNode(tag, [to_html_node(child) for child in children], props)
+
+
+def dumps(node: DocNode) -> bytes:
+    # marshal is tied to the interpreter version, which build workers share
+    return marshal.dumps(node)
+
+
+def loads(data: bytes) -> DocNode:
+    return marshal.loads(data)
+
+
+class Pipeline:
+    """Transforms applied to a document in a single traversal.
+
+    Transforms are registered per tag, or for every node with ``ANY_TAG``, and
+    run in registration order. A transform returns the node to keep, possibly
+    a new one, or None to drop it. Children are transformed before parents.
+    """
+
+    def __init__(self):
+        self._transforms: dict[str, list[Transform]] = {}
+
+    def transform(self, *tags: str) -> Callable[[Transform], Transform]:
+        def register(fn: Transform) -> Transform:
+            for tag in tags or (ANY_TAG,):
+                self._transforms.setdefault(tag, []).append(fn)
+            return fn
+
+        return register
+
+    def run(self, node: DocNode) -> DocNode | None:
+        if not self._transforms:
+            return node
+        return self._visit(node)
+
+    def _visit(self, node: DocNode) -> DocNode | None:
+        tag, value, props, children = node
+        if children is not None:
+            visited = (self._visit(child) for child in children)
+            node = (tag, value, props, tuple(c for c in visited if c is not None))
+
+        for fn in self._transforms.get(tag, ()):
+            node = fn(node)
+            if node is None:
+                return None
+        for fn in self._transforms.get(ANY_TAG, ()):
+            node = fn(node)
+            if node is None:
+                return None
+        return node
+
+
+def load_plugins(names: list[str]) -> Pipeline:
+    """A pipeline with the transforms of each named plugin module.
+
+    A plugin is a module on the import path with a ``register(pipeline)``
+    function, which adds its transforms with ``pipeline.transform``.
+    """
+    pipeline = Pipeline()
+    for name in names:
+        register = getattr(importlib.import_module(name), "register", None)
+        if register is None:
+            raise ValueError(f"Plugin has no register(pipeline) function: {name}")
+        register(pipeline)
+    return pipeline
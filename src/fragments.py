@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import metrics
+from render import render_source
+
+# The modules whose code decides a page's rendered content, from reading the
+# source to rendering HTML. Editing any of them starts a new set of fragments.
+RENDERER_MODULES = (
+    "source_reader.py",
+    "render.py",
+    "block_markdown.py",
+    "inline_markdown.py",
+    "textnode.py",
+    "document.py",
+)
+
+
+def renderer_fingerprint(modules: tuple[str, ...] = RENDERER_MODULES) -> str:
+    sha256 = hashlib.sha256()
+    for name in modules:
+        sha256.update((Path(__file__).parent / name).read_bytes())
+    return sha256.hexdigest()[:16]
+
+
+class FragmentCache:
+    """Rendered page content stored by the SHA-256 of its source, so pages are
+    only parsed when they changed and a template change just re-wraps them.
+
+    Each fragment is its own file under ``cache_dir``, written atomically, so
+    shards building in parallel can share the cache.
+    """
+
+    def __init__(self, cache_dir: Path, fingerprint: str | None = None):
+        self.dir = cache_dir / (fingerprint or renderer_fingerprint())
+        self.used: set[str] = set()
+
+    def render(self, from_path: Path) -> tuple[str, str]:
+        """Like ``render_source``, from the cache when the source is unchanged."""
+        with open(from_path, "rb") as f:
+            sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+        self.used.add(sha256)
+        path = self.dir / f"{sha256}.json"
+        try:
+            with open(path, "r") as f:
+                fragment = json.load(f)
+        except FileNotFoundError:
+            metrics.incr("cache", cache="fragments", result="miss")
+        else:
+            metrics.incr("cache", cache="fragments", result="hit")
+            return fragment["title"], fragment["content"]
+
+        title, content = render_source(from_path)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"title": title, "content": content}, f)
+        os.replace(tmp_path, path)
+        return title, content
+
+    def prune(self):
+        """Remove fragments from other renderer versions, and of sources not
+        rendered through this cache, i.e. deleted or since edited."""
+        for other_dir in self.dir.parent.iterdir():
+            if other_dir != self.dir and other_dir.is_dir():
+                shutil.rmtree(other_dir)
+        if not self.dir.exists():
+            return
+        for path in self.dir.iterdir():
+            if path.stem not in self.used:
+                path.unlink()
@@ -3,6 +3,43 @@ from typing import NamedTuple
 
 from textnode import TextNode, TextType
 
+# Link text stops at a nested bracket and URLs at a nested parenthesis, so a
+# failed match never rescans past the next candidate and matching stays linear.
+_IMAGE_RE = re.compile(r"\!\[([^\[\]]*)\]\(([^()]+)\)")
+_LINK_RE = re.compile(r"(?<!!)\[([^\[\]]+)\]\(([^()]+)\)")
+_URL_RE = re.compile(r"\]\(([^()]+)\)")
+
+
+def _split_on_underscores(text: str) -> list[str]:
+    """Split text on the underscores that can delimit italics.
+
+    Underscores inside words (snake_case) or link and image URLs are literal,
+    and a final unpaired underscore is kept as text instead of raising.
+    """
+    in_urls = set()
+    for match in _URL_RE.finditer(text):
+        in_urls.update(range(match.start(1), match.end(1)))
+
+    positions = [
+        i
+        for i, char in enumerate(text)
+        if char == "_"
+        and i not in in_urls
+        and not (
+            0 < i < len(text) - 1 and text[i - 1].isalnum() and text[i + 1].isalnum()
+        )
+    ]
+    if len(positions) % 2:
+        positions.pop()
+
+    parts = []
+    start = 0
+    for position in positions:
+        parts.append(text[start:position])
+        start = position + 1
+    parts.append(text[start:])
+    return parts
+
 
 def _split_nodes_delimiter(
     old_nodes: list[TextNode], delimiter: str, text_type: TextType
@@ -10,7 +47,10 @@ def _split_nodes_delimiter(
     next_nodes = []
     for node in old_nodes:
         if delimiter in node.text:
-            parts = node.text.split(delimiter)
+            if delimiter == "_":
+                parts = _split_on_underscores(node.text)
+            else:
+                parts = node.text.split(delimiter)
             if len(parts) % 2 == 0:
                 raise ValueError(
                     f"invalid markdown, formatted section not closed: {node.text}"
@@ -36,59 +76,46 @@ class MarkdownLink(NamedTuple):
 
 
 def _extract_markdown_images(markdown: str) -> list[MarkdownImage]:
-    matches = re.findall(r"\!\[([^\]]*)\]\(([^)]+)\)", markdown)
+    matches = _IMAGE_RE.findall(markdown)
     return [MarkdownImage(alt_text, url) for alt_text, url in matches]
 
 
 def _extract_markdown_links(markdown: str) -> list[MarkdownLink]:
-    matches = re.findall(r"(?<!!)\[([^\]]+)\]\(([^)]+)\)", markdown)
+    matches = _LINK_RE.findall(markdown)
     return [MarkdownLink(text, url) for text, url in matches]
 
 
-def _split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
+def _split_nodes_matches(
+    old_nodes: list[TextNode], pattern: re.Pattern, text_type: TextType
+) -> list[TextNode]:
+    # slices around each match in a single pass, rather than re-splitting the
+    # remaining text per match, which is quadratic on link-dense text
     next_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             next_nodes.append(node)
             continue
-        remaining_text = node.text
-        images = _extract_markdown_images(remaining_text)
-        if not images:
+        start = 0
+        for match in pattern.finditer(node.text):
+            if match.start() > start:
+                next_nodes.append(
+                    TextNode(node.text[start : match.start()], TextType.TEXT)
+                )
+            next_nodes.append(TextNode(match[1], text_type, match[2]))
+            start = match.end()
+        if start == 0:
             next_nodes.append(node)
-            continue
-        for alt_text, url in images:
-            image_node = TextNode(alt_text, TextType.IMAGE, url)
-            image_node_str = f"![{alt_text}]({url})"
-            plain_text, remaining_text = remaining_text.split(image_node_str, 1)
-            if plain_text:
-                next_nodes.append(TextNode(plain_text, TextType.TEXT))
-            next_nodes.append(image_node)
-        if remaining_text:
-            next_nodes.append(TextNode(remaining_text, TextType.TEXT))
+        elif start < len(node.text):
+            next_nodes.append(TextNode(node.text[start:], TextType.TEXT))
     return next_nodes
 
 
+def _split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
+    return _split_nodes_matches(old_nodes, _IMAGE_RE, TextType.IMAGE)
+
+
 def _split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
-    next_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            next_nodes.append(node)
-            continue
-        remaining_text = node.text
-        links = _extract_markdown_links(remaining_text)
-        if not links:
-            next_nodes.append(node)
-            continue
-        for text, url in links:
-            link_node = TextNode(text, TextType.LINK, url)
-            link_node_str = f"[{text}]({url})"
-            plain_text, remaining_text = remaining_text.split(link_node_str, 1)
-            if plain_text:
-                next_nodes.append(TextNode(plain_text, TextType.TEXT))
-            next_nodes.append(link_node)
-        if remaining_text:
-            next_nodes.append(TextNode(remaining_text, TextType.TEXT))
-    return next_nodes
+    return _split_nodes_matches(old_nodes, _LINK_RE, TextType.LINK)
 
 
 def text_to_textnodes(text: str) -> list[TextNode]:
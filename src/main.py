@@ -1,84 +1,350 @@
 import os
-import shutil
-import sys
+import re
+from collections.abc import Iterable
 from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
 
-from block_markdown import markdown_to_html_node
+import metrics
+from dependencies import DependencyIndex
+from document import Pipeline
+from publish import check_output_dir, copy_or_link, link_if_unchanged
+from render import render_source
+
+if TYPE_CHECKING:
+    from fragments import FragmentCache
 
 ROOT_DIR = Path(__file__).parent.parent
 PUBLIC_DIR = ROOT_DIR / "public"
 STATIC_DIR = ROOT_DIR / "static"
 DOCS_DIR = ROOT_DIR / "docs"
+CACHE_DIR = ROOT_DIR / ".cache"
+
+_PARTIAL_RE = re.compile(r"\{\{> *([\w/-]+) *\}\}")
 
 
-def clean_public_dir():
-    if DOCS_DIR.exists():
-        shutil.rmtree(DOCS_DIR)
-    DOCS_DIR.mkdir(parents=True, exist_ok=True)
+class BuildTarget(NamedTuple):
+    basepath: str
+    output_dir: Path
 
 
-def copy_static():
-    shutil.copytree(STATIC_DIR, DOCS_DIR, dirs_exist_ok=True)
+def parse_target(arg: str) -> BuildTarget:
+    # "/ssg/" builds into docs/, "/ssg/=staging" builds into staging/
+    basepath, sep, output_dir = arg.partition("=")
+    if not basepath:
+        raise ValueError(f"Invalid target, basepath is empty: {arg}")
+    if sep and Path(output_dir) == Path("."):
+        raise ValueError(f"Invalid target, output dir is empty: {arg}")
+    target = BuildTarget(basepath, ROOT_DIR / output_dir if sep else DOCS_DIR)
+    check_output_dir(target.output_dir)
+    return target
 
 
-def extract_title(markdown: str):
-    if not markdown.startswith("# "):
-        raise ValueError("Markdown must start with a title")
-    return markdown.splitlines()[0].strip("# ")
+def copy_static(
+    output_dir: Path = DOCS_DIR,
+    static_dir: Path = STATIC_DIR,
+    publish_dir: Path | None = None,
+):
+    import shutil
 
+    def copy_function(src: str, dst: str):
+        if publish_dir is None:
+            shutil.copy2(src, dst)
+            linked = False
+        else:
+            # output_dir is a staging dir, link what is unchanged in publish_dir
+            linked = copy_or_link(src, dst, publish_dir, output_dir)
+        if linked:
+            metrics.incr("static_files", result="linked")
+        else:
+            metrics.incr("static_files", result="copied")
+            metrics.incr("bytes_written", os.path.getsize(dst))
 
-def generate_page(from_path: Path, template_path: Path, to_path: Path, basepath: str):
-    print(f"Generating page from {from_path} to {to_path} using {template_path}")
+    shutil.copytree(
+        static_dir, output_dir, copy_function=copy_function, dirs_exist_ok=True
+    )
 
-    with open(from_path, "r") as md_source_file:
-        md_source = md_source_file.read()
 
-    title = extract_title(md_source)
+def load_template(template_path: Path) -> tuple[str, list[Path]]:
+    """Read a template with its ``{{> name }}`` partials expanded.
+
+    Partials are read from ``partials/name.html`` next to the template and may
+    include other partials. Returns the template and every file it was read from.
+    """
+    partials_dir = template_path.parent / "partials"
+    read = []
+
+    def expand(path: Path, including: tuple[Path, ...]) -> str:
+        if path in including:
+            raise ValueError(f"Partial includes itself: {path}")
+        read.append(path)
+        with open(path, "r") as f:
+            text = f.read()
+        return _PARTIAL_RE.sub(
+            lambda match: expand(
+                partials_dir / f"{match[1]}.html", including + (path,)
+            ),
+            text,
+        )
+
+    return expand(template_path, ()), read
+
+
+def apply_template(html_template: str, title: str, content: str) -> str:
+    return html_template.replace("{{ Title }}", title).replace("{{ Content }}", content)
+
+
+def apply_basepath(html: str, basepath: str) -> str:
+    if basepath == "/":
+        return html
+    return html.replace('href="/', f'href="{basepath}').replace(
+        'src="/', f'src="{basepath}'
+    )
 
-    with open(template_path, "r") as html_template_file:
-        html_template = html_template_file.read()
 
-    html = markdown_to_html_node(md_source).to_html()
+def write_page(html: str, to_path: Path, previous_path: Path | None = None) -> bool:
+    """Write a page, or hard-link ``previous_path`` if it holds the same HTML.
 
+    The file is replaced rather than rewritten, so files hard-linked into kept
+    generations are never modified. Returns whether the previous file was reused.
+    """
+    data = html.encode()
     os.makedirs(to_path.parent, exist_ok=True)
-    with open(to_path, "w") as f:
-        f.write(
-            html_template.replace("{{ Title }}", title)
-            .replace("{{ Content }}", html)
-            .replace('href="/', f'href="{basepath}')
-            .replace('src="/', f'src="{basepath}')
+    if previous_path is not None and link_if_unchanged(previous_path, data, to_path):
+        metrics.incr("pages", result="skipped")
+        return True
+    tmp_path = to_path.with_name(f".{to_path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, to_path)
+    metrics.incr("pages", result="built")
+    metrics.incr("bytes_written", len(data))
+    return False
+
+
+def find_pages(content_dir: Path) -> list[Path]:
+    pages = []
+    # sorted, so output order does not depend on the filesystem
+    for file in sorted(content_dir.iterdir()):
+        if file.is_file() and file.suffix == ".md":
+            pages.append(file)
+        elif file.is_dir():
+            pages.extend(find_pages(file))
+    return pages
+
+
+def write_to_targets(
+    page: str,
+    rel_path: Path,
+    targets: list[BuildTarget],
+    publish_dirs: list[Path] | None = None,
+    dependencies: DependencyIndex | None = None,
+    inputs: Iterable[Path] = (),
+):
+    """Write a page to ``rel_path`` in each target, with the target's basepath.
+
+    ``publish_dirs`` are as for ``generate_site``, and ``dependencies`` records
+    each output as built from ``inputs``.
+    """
+    inputs = [path.resolve() for path in inputs]
+    for i, target in enumerate(targets):
+        to_path = target.output_dir / rel_path
+        published_path = publish_dirs[i] / rel_path if publish_dirs else to_path
+        write_page(
+            apply_basepath(page, target.basepath),
+            to_path,
+            published_path if publish_dirs else None,
         )
+        if dependencies is not None:
+            dependencies.record(published_path.resolve(), inputs)
+
+
+class RenderedPage(NamedTuple):
+    source: Path
+    output: Path
+    title: str
+
+
+def generate_site(
+    content_dir: Path,
+    template_path: Path,
+    targets: list[BuildTarget],
+    shard: tuple[int, int] | None = None,
+    pipeline: Pipeline | None = None,
+    dependencies: DependencyIndex | None = None,
+    publish_dirs: list[Path] | None = None,
+    fragments: "FragmentCache | None" = None,
+) -> list[RenderedPage]:
+    """Parse and render every page once, then write it out for each target.
+
+    With a shard ``(index, count)`` only the pages hashed to that shard are built.
+    A ``pipeline`` transforms each page's document before it is rendered, and
+    ``dependencies`` records the files each output was built from. Without a
+    pipeline, ``fragments`` caches the rendered content of unchanged pages.
+
+    When the targets' output dirs are staging dirs, ``publish_dirs`` are where
+    each will be published. Pages unchanged there are hard-linked, not rewritten.
+    Returns the pages written, with paths relative to the content and output dirs.
+    """
+    output_dirs = [target.output_dir for target in targets]
+    if len(set(output_dirs)) != len(output_dirs):
+        raise ValueError(f"Build targets must not share an output directory: {targets}")
+
+    if shard:
+        from sharding import shard_of
+
+    html_template, template_inputs = load_template(template_path)
+
+    rendered = []
+    for from_path in find_pages(content_dir):
+        source = from_path.relative_to(content_dir)
+        if shard and shard_of(source, shard[1]) != shard[0]:
+            continue
+
+        with metrics.phase("render"):
+            if fragments is not None and pipeline is None:
+                title, content = fragments.render(from_path)
+            else:
+                title, content = render_source(from_path, pipeline)
+            page = apply_template(html_template, title, content)
+
+        rel_path = source.with_suffix(".html")
+        for target in targets:
+            to_path = target.output_dir / rel_path
+            print(
+                f"Generating page from {from_path} to {to_path} using {template_path}"
+            )
+        write_to_targets(
+            page,
+            rel_path,
+            targets,
+            publish_dirs,
+            dependencies,
+            [from_path, *template_inputs],
+        )
+        rendered.append(RenderedPage(source, rel_path, title))
+    return rendered
 
 
 def generate_pages_recursively(
     content_dir: Path, template_path: Path, public_dir: Path, basepath: str
 ):
-    for file in content_dir.iterdir():
-        if file.is_file() and file.suffix == ".md":
-            generate_page(
-                file,
-                template_path,
-                public_dir / file.name.replace(".md", ".html"),
-                basepath,
-            )
-        elif file.is_dir():
-            generate_pages_recursively(
-                file, template_path, public_dir / file.name, basepath
-            )
+    generate_site(content_dir, template_path, [BuildTarget(basepath, public_dir)])
 
 
 def main():
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
-    print(f"Using basepath: {basepath}")
+    # deferred so that importing main, e.g. from the build server, stays cheap
+    import argparse
 
-    clean_public_dir()
-    copy_static()
+    from digest import digest_key, stamp_mtimes, write_digest
+    from document import load_plugins
+    from fragments import FragmentCache
+    from pagination import PER_PAGE, SummaryCache, generate_collection, parse_per_page
+    from publish import KEEP_GENERATIONS, publish, start_staging
+    from sharding import dependencies_name, parse_shard, write_manifest
 
-    generate_pages_recursively(
-        ROOT_DIR / "content", ROOT_DIR / "template.html", DOCS_DIR, basepath
+    parser = argparse.ArgumentParser(description="Build the site from content/")
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        type=parse_target,
+        help="basepath or basepath=output_dir, defaults to / into docs/",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        help="build only shard I of N (e.g. 0/4) and write a shard manifest",
+    )
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=KEEP_GENERATIONS,
+        help="previous outputs to keep for rollback with publish.py",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=metrics.metrics_path,
+        action="append",
+        default=[],
+        help="write build metrics to a .prom file, or append them to a .jsonl file",
+    )
+    parser.add_argument(
+        "--plugin",
+        action="append",
+        default=[],
+        metavar="MODULE",
+        help="module whose register(pipeline) adds document transforms",
+    )
+    parser.add_argument(
+        "--paginate",
+        action="append",
+        default=[],
+        metavar="COLLECTION",
+        help="write paginated listings of a content dir, e.g. blog",
     )
+    parser.add_argument(
+        "--per-page",
+        type=parse_per_page,
+        default=PER_PAGE,
+        help="pages per listing page",
+    )
+    args = parser.parse_args()
+    targets = args.targets or [BuildTarget("/", DOCS_DIR)]
+
+    # build into staging dirs, the served output is only replaced once complete
+    staged_targets = []
+    with metrics.phase("static"):
+        for target in targets:
+            print(f"Using basepath: {target.basepath} -> {target.output_dir}")
+            staging = start_staging(target.output_dir)
+            # static files are not sharded, the first shard carries them
+            if not args.shard or args.shard[0] == 0:
+                copy_static(staging, publish_dir=target.output_dir)
+            staged_targets.append(BuildTarget(target.basepath, staging))
+
+    with metrics.phase("pages"):
+        dependencies = DependencyIndex()
+        fragments = FragmentCache(CACHE_DIR / "fragments")
+        pages = generate_site(
+            ROOT_DIR / "content",
+            ROOT_DIR / "template.html",
+            staged_targets,
+            args.shard,
+            load_plugins(args.plugin) if args.plugin else None,
+            dependencies=dependencies,
+            publish_dirs=[target.output_dir for target in targets],
+            fragments=fragments,
+        )
+        if not args.shard:
+            # other shards' fragments are not in use here
+            fragments.prune()
+        # listings need every page's summary, the first shard builds them
+        if args.paginate and (not args.shard or args.shard[0] == 0):
+            summaries = SummaryCache(CACHE_DIR / "summaries.json")
+            for collection in args.paginate:
+                pages += generate_collection(
+                    ROOT_DIR / "content",
+                    collection,
+                    ROOT_DIR / "template.html",
+                    staged_targets,
+                    summaries,
+                    args.per_page,
+                    dependencies,
+                    [target.output_dir for target in targets],
+                )
+            summaries.save()
+        dependencies.save(CACHE_DIR / dependencies_name(args.shard))
+
+    with metrics.phase("publish"):
+        for target, staged in zip(targets, staged_targets):
+            if args.shard:
+                write_manifest(staged.output_dir, args.shard, target.basepath, pages)
+            else:
+                write_digest(staged.output_dir, digest_key())
+            stamp_mtimes(staged.output_dir, target.output_dir)
+            publish(staged.output_dir, target.output_dir, args.keep)
+
+    for metrics_path in args.metrics:
+        metrics.write(metrics_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+import json
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+# Counters and phase durations for the current build, keyed by metric name and
+# sorted label pairs. Reporting is a dict update, cheap enough for hot paths.
+_counters: dict[tuple[str, tuple], float] = {}
+_durations: dict[str, float] = {}
+
+PREFIX = "ssg_"
+FORMATS = (".prom", ".jsonl")
+
+
+def incr(name: str, value: float = 1, **labels: str):
+    key = (name, tuple(sorted(labels.items())))
+    _counters[key] = _counters.get(key, 0) + value
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _durations[name] = _durations.get(name, 0) + time.perf_counter() - start
+
+
+def reset():
+    _counters.clear()
+    _durations.clear()
+
+
+def peak_rss_bytes() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def samples() -> list[tuple[str, dict[str, str], float]]:
+    """Every metric as ``(name, labels, value)``, in a stable order."""
+    result = [
+        (f"{name}_total", dict(labels), value)
+        for (name, labels), value in sorted(_counters.items())
+    ]
+    result += [
+        ("phase_duration_seconds", {"phase": name}, duration)
+        for name, duration in sorted(_durations.items())
+    ]
+    peak_rss = peak_rss_bytes()
+    if peak_rss is not None:
+        result.append(("peak_rss_bytes", {}, peak_rss))
+    return result
+
+
+def _metric_type(name: str) -> str:
+    return "counter" if name.endswith("_total") else "gauge"
+
+
+def to_prometheus() -> str:
+    lines = []
+    typed = set()
+    for name, labels, value in samples():
+        if name not in typed:
+            lines.append(f"# TYPE {PREFIX}{name} {_metric_type(name)}")
+            typed.add(name)
+        label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+        if label_str:
+            label_str = f"{{{label_str}}}"
+        lines.append(f"{PREFIX}{name}{label_str} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def to_jsonl(timestamp: float | None = None) -> str:
+    timestamp = time.time() if timestamp is None else timestamp
+    return "".join(
+        json.dumps(
+            {
+                "timestamp": timestamp,
+                "metric": PREFIX + name,
+                "labels": labels,
+                "value": value,
+            }
+        )
+        + "\n"
+        for name, labels, value in samples()
+    )
+
+
+def metrics_path(arg: str) -> Path:
+    path = Path(arg)
+    if path.suffix not in FORMATS:
+        raise ValueError(f"Metrics file must end in {' or '.join(FORMATS)}: {arg}")
+    return path
+
+
+def write(path: Path):
+    """Write Prometheus text to a ``.prom`` file, or append JSON lines to a
+    ``.jsonl`` file so it keeps a history of builds."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if metrics_path(str(path)).suffix == ".prom":
+        with open(path, "w") as f:
+            f.write(to_prometheus())
+    else:
+        with open(path, "a") as f:
+            f.write(to_jsonl())
@@ -0,0 +1,224 @@
+import hashlib
+import json
+from datetime import date
+from pathlib import Path
+from typing import NamedTuple
+
+import metrics
+from block_markdown import BlockType, block_to_block_type, paragraph_md_to_doc_node
+from dependencies import DependencyIndex
+from document import to_html
+from fragments import RENDERER_MODULES, renderer_fingerprint
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from inline_markdown import text_to_textnodes
+from main import (
+    BuildTarget,
+    RenderedPage,
+    apply_template,
+    find_pages,
+    load_template,
+    write_to_targets,
+)
+from render import extract_title
+from source_reader import iter_blocks
+from textnode import TextType
+
+# An optional "Date: 2024-05-01" paragraph after the title dates a page, in
+# ISO format so that dates sort as text.
+DATE_PREFIX = "Date: "
+PER_PAGE = 10
+
+
+def parse_per_page(arg: str) -> int:
+    if not arg.isdigit() or int(arg) < 1:
+        raise ValueError(f"Pages per listing page must be at least 1: {arg}")
+    return int(arg)
+
+
+class PageSummary(NamedTuple):
+    source: str
+    url: str
+    title: str
+    date: str
+    summary: str
+
+
+def page_url(source: Path) -> str:
+    return "/" + source.with_suffix(".html").as_posix().removesuffix("index.html")
+
+
+def _is_navigation(block: str) -> bool:
+    # paragraphs of only links and images, like "[< Back Home](/)"
+    return all(
+        node.text_type in (TextType.LINK, TextType.IMAGE) or not node.text.strip()
+        for node in text_to_textnodes(block.replace("\n", " "))
+    )
+
+
+def parse_date(value: str, from_path: Path) -> str:
+    try:
+        return date.fromisoformat(value.strip()).isoformat()
+    except ValueError:
+        raise ValueError(
+            f"Invalid date in {from_path}, expected YYYY-MM-DD: {value}"
+        ) from None
+
+
+def summarize(from_path: Path, source: Path) -> PageSummary:
+    """Read a page up to its first paragraph, which is the only part rendered."""
+    blocks = iter_blocks(from_path)
+    title = extract_title(next(blocks, ""))
+    published = ""
+    summary = ""
+    for block in blocks:
+        if block_to_block_type(block) != BlockType.PARAGRAPH or _is_navigation(block):
+            continue
+        if not published and "\n" not in block and block.startswith(DATE_PREFIX):
+            published = parse_date(block.removeprefix(DATE_PREFIX), from_path)
+            continue
+        summary = to_html(paragraph_md_to_doc_node(block))
+        break
+    return PageSummary(source.as_posix(), page_url(source), title, published, summary)
+
+
+class SummaryCache:
+    """Page summaries stored by the SHA-256 of their source, so a page is only
+    read past its hash when it changed. Entries of pages not summarized since
+    the cache was loaded are dropped when it is saved.
+
+    Each entry also records the fingerprint of the code that rendered it, so a
+    parser change summarizes every page again.
+    """
+
+    def __init__(self, path: Path, fingerprint: str | None = None):
+        self.path = path
+        self.fingerprint = fingerprint or renderer_fingerprint(
+            (*RENDERER_MODULES, "pagination.py")
+        )
+        self.entries: dict[str, dict] = {}
+        self.seen: set[str] = set()
+        if path.exists():
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+
+    def summary(self, from_path: Path, source: Path) -> PageSummary:
+        with open(from_path, "rb") as f:
+            sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+        self.seen.add(source.as_posix())
+        entry = self.entries.get(source.as_posix())
+        if (
+            entry
+            and entry["sha256"] == sha256
+            and entry.get("fingerprint") == self.fingerprint
+        ):
+            metrics.incr("cache", cache="summaries", result="hit")
+            return PageSummary(**entry["summary"])
+        metrics.incr("cache", cache="summaries", result="miss")
+        summary = summarize(from_path, source)
+        self.entries[source.as_posix()] = {
+            "sha256": sha256,
+            "fingerprint": self.fingerprint,
+            "summary": summary._asdict(),
+        }
+        return summary
+
+    def save(self):
+        self.entries = {
+            source: entry
+            for source, entry in self.entries.items()
+            if source in self.seen
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+
+
+def listing_url(collection: str, number: int) -> str:
+    return f"/{collection}/page/{number}/"
+
+
+def render_listing(
+    collection: str, title: str, summaries: list[PageSummary], number: int, count: int
+) -> str:
+    items = []
+    for summary in summaries:
+        children: list[HTMLNode] = [LeafNode("a", summary.title, {"href": summary.url})]
+        if summary.date:
+            children.append(LeafNode("time", summary.date))
+        if summary.summary:
+            children.append(LeafNode(None, summary.summary))
+        items.append(ParentNode("li", children))
+
+    links = []
+    if number > 1:
+        links.append(
+            LeafNode("a", "Newer", {"href": listing_url(collection, number - 1)})
+        )
+    if number < count:
+        links.append(
+            LeafNode("a", "Older", {"href": listing_url(collection, number + 1)})
+        )
+
+    children = [LeafNode("h1", title)]
+    if items:
+        children.append(ParentNode("ul", items))
+    if links:
+        children.append(ParentNode("nav", links))
+    return ParentNode("div", children).to_html()
+
+
+def generate_collection(
+    content_dir: Path,
+    collection: str,
+    template_path: Path,
+    targets: list[BuildTarget],
+    cache: SummaryCache,
+    per_page: int = PER_PAGE,
+    dependencies: DependencyIndex | None = None,
+    publish_dirs: list[Path] | None = None,
+) -> list[RenderedPage]:
+    """Write paginated listings of the pages under ``content_dir/collection``,
+    newest first, to ``collection/page/N/index.html``.
+
+    Listings are built from cached summaries rather than the rendered pages.
+    Listing pages whose slice did not change end up identical to the published
+    ones, and are hard-linked rather than rewritten.
+    """
+    collection_dir = content_dir / collection
+    html_template, template_inputs = load_template(template_path)
+    from_paths = [
+        from_path
+        for from_path in find_pages(collection_dir)
+        if from_path != collection_dir / "index.md"
+    ]
+    summaries = sorted(
+        (
+            cache.summary(from_path, from_path.relative_to(content_dir))
+            for from_path in from_paths
+        ),
+        key=lambda summary: summary.source,
+    )
+    summaries.sort(key=lambda summary: summary.date, reverse=True)
+
+    title = collection.rsplit("/", 1)[-1].replace("-", " ").capitalize()
+    count = max(1, -(-len(summaries) // per_page))
+    rendered = []
+    for number in range(1, count + 1):
+        page_summaries = summaries[(number - 1) * per_page : number * per_page]
+        page_title = f"{title}, page {number}" if count > 1 else title
+        content = render_listing(collection, title, page_summaries, number, count)
+        page = apply_template(html_template, page_title, content)
+
+        rel_path = Path(collection) / "page" / str(number) / "index.html"
+        write_to_targets(
+            page,
+            rel_path,
+            targets,
+            publish_dirs,
+            dependencies,
+            [*from_paths, *template_inputs],
+        )
+        rendered.append(
+            RenderedPage(Path(collection) / "page" / str(number), rel_path, page_title)
+        )
+    return rendered
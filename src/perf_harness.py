@@ -0,0 +1,283 @@
+import hashlib
+import random
+import re
+import statistics
+import sys
+import time
+from collections.abc import Callable, Iterable
+from itertools import pairwise
+from pathlib import Path
+
+from block_markdown import markdown_to_document
+from document import to_html
+from inline_markdown import text_to_textnodes
+from textnode import TextNode, TextType
+
+# Inputs that once parsed in superlinear time, each repeated like the units below.
+CORPUS_DIR = Path(__file__).parent / "perf_corpus"
+
+# Parse time of 4x the input over 4x the time of the input: ~1 when linear,
+# ~4 when quadratic. Leaves room for timer noise.
+MAX_GROWTH = 2.5
+GROWTH_FACTOR = 4
+
+# Units that are repeated to build adversarial inputs of any size.
+ADVERSARIAL_UNITS = {
+    "link_dense": "x [a](b) ",
+    "image_dense": "![a](b) y ",
+    "bangs": "!",
+    "snake_case": "a_b ",
+    "url_underscores": "[a](b_c) ",
+    "underscores": "_",
+    "backticks": "`",
+    "bold_markers": "** a ",
+    "code_fence": "```\na\n",
+    "quotes": "> a\n",
+    "nested_list": "- a\n  - b\n    1. c\n",
+    "table_rows": "| x | y |\n",
+    "blocks": "a\n\n",
+}
+
+_FUZZ_TOKENS = [
+    "a",
+    "word ",
+    " ",
+    "\n",
+    "\n\n",
+    "[",
+    "]",
+    "(",
+    ")",
+    "!",
+    "_",
+    "**",
+    "`",
+    "#",
+    "- ",
+    "1. ",
+    "> ",
+    "| ",
+    "[a](b)",
+    "![a](b)",
+    "_i_",
+    "**b**",
+    "snake_case",
+    "https://e.com/a_b",
+]
+
+
+def parse(markdown: str) -> str | None:
+    """Render markdown, or None if the parser rejects it."""
+    try:
+        return to_html(markdown_to_document(markdown))
+    except ValueError:
+        return None
+
+
+def time_parse(markdown: str, repeat: int = 5) -> float:
+    """Median CPU time of parsing, which other processes skew less than wall time."""
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time()
+        parse(markdown)
+        timings.append(time.process_time() - start)
+    return statistics.median(timings)
+
+
+def growth(unit: str, min_seconds: float = 0.05) -> float:
+    """How much parse time per character grows when the input grows.
+
+    ``unit`` is repeated until parsing takes ``min_seconds``, so the timings
+    are well above timer noise, then compared with
+    ``GROWTH_FACTOR`` times that.
+    """
+    count = 1
+    while time_parse(unit * count, repeat=1) < min_seconds and count < 1 << 16:
+        count *= 2
+    small = time_parse(unit * count)
+    large = time_parse(unit * count * GROWTH_FACTOR)
+    return large / small / GROWTH_FACTOR
+
+
+# Intended differences from the inline parser before the linear-time rewrite.
+# The reference below is that parser, pinned, with each of these applied on
+# top of it. Any other difference from it is a finding.
+INTENDED_DIFFERENCES = (
+    # link text and alt text stop at a nested bracket, URLs at a parenthesis
+    "nested_brackets",
+    # underscores inside words, as in snake_case, are literal
+    "word_underscores",
+    # underscores inside link and image URLs are literal
+    "url_underscores",
+    # a final unpaired underscore is text rather than an error
+    "unpaired_underscore",
+)
+
+_REFERENCE_PATTERNS = {
+    # (image, link) patterns, without and with nested_brackets
+    False: (
+        re.compile(r"\!\[([^\]]*)\]\(([^)]+)\)"),
+        re.compile(r"(?<!!)\[([^\]]+)\]\(([^)]+)\)"),
+    ),
+    True: (
+        re.compile(r"\!\[([^\[\]]*)\]\(([^()]+)\)"),
+        re.compile(r"(?<!!)\[([^\[\]]+)\]\(([^()]+)\)"),
+    ),
+}
+_REFERENCE_URL_RE = re.compile(r"\]\(([^()]+)\)")
+_REFERENCE_WORD_UNDERSCORE_RE = re.compile(r"(?<=[^\W_])_(?=[^\W_])")
+
+
+def _reference_split(
+    text: str, delimiter: str, differences: Iterable[str]
+) -> list[str]:
+    if delimiter != "_":
+        return text.split(delimiter)
+    literal = set()
+    if "url_underscores" in differences:
+        for match in _REFERENCE_URL_RE.finditer(text):
+            literal.update(range(match.start(1), match.end(1)))
+    if "word_underscores" in differences:
+        literal.update(
+            match.start() for match in _REFERENCE_WORD_UNDERSCORE_RE.finditer(text)
+        )
+    delimiters = [i for i, char in enumerate(text) if char == "_" and i not in literal]
+    if len(delimiters) % 2 and "unpaired_underscore" in differences:
+        delimiters.pop()
+    bounds = [-1, *delimiters, len(text)]
+    return [text[start + 1 : end] for start, end in pairwise(bounds)]
+
+
+def _reference_split_nodes_delimiter(
+    old_nodes: list[TextNode],
+    delimiter: str,
+    text_type: TextType,
+    differences: Iterable[str],
+) -> list[TextNode]:
+    next_nodes = []
+    for node in old_nodes:
+        if delimiter not in node.text:
+            next_nodes.append(node)
+            continue
+        parts = _reference_split(node.text, delimiter, differences)
+        if len(parts) % 2 == 0:
+            raise ValueError(
+                f"invalid markdown, formatted section not closed: {node.text}"
+            )
+        for i, part in enumerate(parts):
+            next_nodes.append(
+                TextNode(part, TextType.TEXT if i % 2 == 0 else text_type)
+            )
+    return next_nodes
+
+
+def _reference_split_nodes_matches(
+    old_nodes: list[TextNode], pattern: re.Pattern, text_type: TextType, prefix: str
+) -> list[TextNode]:
+    # the original split-per-match implementation
+    next_nodes = []
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT:
+            next_nodes.append(node)
+            continue
+        remaining_text = node.text
+        matches = pattern.findall(remaining_text)
+        if not matches:
+            next_nodes.append(node)
+            continue
+        for text, url in matches:
+            plain_text, remaining_text = remaining_text.split(
+                f"{prefix}[{text}]({url})", 1
+            )
+            if plain_text:
+                next_nodes.append(TextNode(plain_text, TextType.TEXT))
+            next_nodes.append(TextNode(text, text_type, url))
+        if remaining_text:
+            next_nodes.append(TextNode(remaining_text, TextType.TEXT))
+    return next_nodes
+
+
+def reference_text_to_textnodes(
+    text: str, differences: Iterable[str] = INTENDED_DIFFERENCES
+) -> list[TextNode]:
+    differences = set(differences)
+    next_nodes = [TextNode(text, TextType.TEXT)]
+    for delimiter, text_type in [
+        ("**", TextType.BOLD),
+        ("_", TextType.ITALIC),
+        ("`", TextType.CODE),
+    ]:
+        next_nodes = _reference_split_nodes_delimiter(
+            next_nodes, delimiter, text_type, differences
+        )
+    image_re, link_re = _REFERENCE_PATTERNS["nested_brackets" in differences]
+    next_nodes = _reference_split_nodes_matches(
+        next_nodes, image_re, TextType.IMAGE, "!"
+    )
+    return _reference_split_nodes_matches(next_nodes, link_re, TextType.LINK, "")
+
+
+def inline_or_none(
+    parse_inline: Callable[[str], list[TextNode]], text: str
+) -> list[TextNode] | None:
+    """Inline nodes for ``text``, or None if the parser rejects it."""
+    try:
+        return parse_inline(text)
+    except ValueError:
+        return None
+
+
+def reference_mismatch(text: str) -> str | None:
+    """Describe how the inline parser differs from the reference on ``text``."""
+    current = inline_or_none(text_to_textnodes, text)
+    reference = inline_or_none(reference_text_to_textnodes, text)
+    if current == reference:
+        return None
+    return f"inline parser gives {current}, reference gives {reference}"
+
+
+def random_markdown(rng: random.Random, tokens: int) -> str:
+    return "".join(rng.choice(_FUZZ_TOKENS) for _ in range(tokens))
+
+
+def load_corpus(corpus_dir: Path = CORPUS_DIR) -> dict[str, str]:
+    return {path.name: path.read_text() for path in sorted(corpus_dir.glob("*.md"))}
+
+
+def fuzz(iterations: int, seed: int, corpus_dir: Path = CORPUS_DIR) -> list[str]:
+    """Check random inputs for superlinear parsing and reference mismatches.
+
+    Slow inputs are saved to ``corpus_dir`` for the tests to replay. Returns a
+    description of every finding.
+    """
+    rng = random.Random(seed)
+    findings = []
+    for _ in range(iterations):
+        unit = random_markdown(rng, rng.randint(1, 40))
+        mismatch = reference_mismatch(unit)
+        if mismatch:
+            findings.append(f"{mismatch} on {unit!r}")
+        unit_growth = growth(unit)
+        if unit_growth > MAX_GROWTH:
+            name = hashlib.sha1(unit.encode()).hexdigest()[:12]
+            corpus_dir.mkdir(exist_ok=True)
+            (corpus_dir / f"fuzz-{name}.md").write_text(unit)
+            findings.append(f"growth {unit_growth:.1f} on {unit!r}, saved {name}")
+    return findings
+
+
+def main():
+    # perf_harness.py [iterations] [seed]
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    for name, unit in ADVERSARIAL_UNITS.items():
+        print(f"{name}: growth {growth(unit):.2f}")
+    findings = fuzz(iterations, seed)
+    for finding in findings:
+        print(finding)
+    if findings:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
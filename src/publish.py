@@ -0,0 +1,155 @@
+import filecmp
+import os
+import sys
+import time
+from pathlib import Path
+
+KEEP_GENERATIONS = 3
+
+ROOT_DIR = Path(__file__).parent.parent
+# what the site is built from, which swapping an output dir must never move
+SOURCE_PATHS = tuple(
+    ROOT_DIR / name for name in ("content", "static", "src", "template.html")
+)
+
+
+def staging_dir(output_dir: Path) -> Path:
+    return output_dir.with_name(f".{output_dir.name}.staging")
+
+
+def generations_dir(output_dir: Path) -> Path:
+    return output_dir.with_name(f".{output_dir.name}.generations")
+
+
+def check_output_dir(output_dir: Path):
+    """Refuse an output dir whose swap would move the checkout or its sources."""
+    resolved = output_dir.resolve()
+    root = ROOT_DIR.resolve()
+    if resolved == root or resolved in root.parents:
+        raise ValueError(f"Output directory contains the repository: {output_dir}")
+    for source in SOURCE_PATHS:
+        source = source.resolve()
+        if resolved == source or resolved in source.parents:
+            raise ValueError(f"Output directory contains {source}: {output_dir}")
+
+
+def start_staging(output_dir: Path) -> Path:
+    """Create an empty staging dir next to ``output_dir``, on the same filesystem."""
+    import shutil
+
+    check_output_dir(output_dir)
+    staging = staging_dir(output_dir)
+    if staging.exists():
+        # left over from a build that crashed before publishing
+        shutil.rmtree(staging)
+    staging.mkdir(parents=True)
+    return staging
+
+
+def link_if_unchanged(previous_path: Path, data: bytes, to_path: Path) -> bool:
+    """Hard-link ``previous_path`` to ``to_path`` if it already holds ``data``."""
+    try:
+        if previous_path.stat().st_size != len(data):
+            return False
+        with open(previous_path, "rb") as f:
+            if f.read() != data:
+                return False
+    except FileNotFoundError:
+        return False
+    os.link(previous_path, to_path)
+    return True
+
+
+def copy_or_link(
+    from_path: str, to_path: str, previous_dir: Path, staging: Path
+) -> bool:
+    """``copy_function`` for ``shutil.copytree`` into a staging dir, which links
+    files that are unchanged since the previous output instead of copying them.
+    Returns whether the file was linked."""
+    import shutil
+
+    previous_path = previous_dir / Path(to_path).relative_to(staging)
+    if previous_path.is_file() and filecmp.cmp(from_path, previous_path, shallow=False):
+        os.link(previous_path, to_path)
+        return True
+    shutil.copyfile(from_path, to_path)
+    return False
+
+
+def _rename_exchange(a: Path, b: Path) -> bool:
+    """Swap two paths in one atomic step with renameat2(RENAME_EXCHANGE).
+
+    Returns False where that is unavailable, e.g. outside Linux or on
+    filesystems that do not support it.
+    """
+    try:
+        import ctypes
+
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return False
+    at_fdcwd, rename_exchange = -100, 2
+    result = renameat2(
+        at_fdcwd, os.fsencode(a), at_fdcwd, os.fsencode(b), rename_exchange
+    )
+    return result == 0
+
+
+def _swap(new_dir: Path, output_dir: Path, old_dir: Path):
+    # output_dir ends up with new_dir's contents, old_dir with the old output
+    if output_dir.exists():
+        if _rename_exchange(new_dir, output_dir):
+            os.rename(new_dir, old_dir)
+            return
+        # the output is missing only between these two renames
+        os.rename(output_dir, old_dir)
+    os.rename(new_dir, output_dir)
+
+
+def generations(output_dir: Path) -> list[Path]:
+    """Previous outputs kept for rollback, oldest first."""
+    if not generations_dir(output_dir).exists():
+        return []
+    return sorted(generations_dir(output_dir).iterdir())
+
+
+def publish(staging: Path, output_dir: Path, keep: int = KEEP_GENERATIONS):
+    """Swap a finished staging dir into place, keeping the replaced output and
+    up to ``keep`` generations in total for rollback."""
+    import shutil
+
+    check_output_dir(output_dir)
+    generations_dir(output_dir).mkdir(exist_ok=True)
+    _swap(staging, output_dir, generations_dir(output_dir) / str(time.time_ns()))
+    previous = generations(output_dir)
+    for generation in previous[: max(len(previous) - keep, 0)]:
+        shutil.rmtree(generation)
+
+
+def rollback(output_dir: Path) -> Path:
+    """Put the newest kept generation back in place and discard the current output."""
+    import shutil
+
+    check_output_dir(output_dir)
+    previous = generations(output_dir)
+    if not previous:
+        raise ValueError(f"No previous generation of {output_dir} to roll back to")
+    discarded = staging_dir(output_dir)
+    if discarded.exists():
+        shutil.rmtree(discarded)
+    _swap(previous[-1], output_dir, discarded)
+    if discarded.exists():
+        shutil.rmtree(discarded)
+    return previous[-1]
+
+
+def main():
+    # publish.py rollback output_dir
+    if len(sys.argv) != 3 or sys.argv[1] != "rollback":
+        sys.exit("Usage: publish.py rollback output_dir")
+    generation = rollback(Path(sys.argv[2]))
+    print(f"Rolled back {sys.argv[2]} to generation {generation.name}")
+
+
+if __name__ == "__main__":
+    main()
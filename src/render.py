@@ -0,0 +1,36 @@
+from collections.abc import Iterable
+from itertools import chain
+from pathlib import Path
+
+from block_markdown import blocks_to_document, markdown_to_blocks
+from document import Pipeline, to_html
+from source_reader import iter_blocks
+
+# Everything that decides a page's rendered content, apart from the parser
+# itself, lives here, away from templating and output. See fragments.py.
+
+
+def extract_title(markdown: str):
+    if not markdown.startswith("# "):
+        raise ValueError("Markdown must start with a title")
+    return markdown.splitlines()[0].strip("# ")
+
+
+def _render_blocks(blocks: Iterable[str], pipeline: Pipeline | None) -> str:
+    document = blocks_to_document(blocks)
+    if pipeline is not None:
+        document = pipeline.run(document)
+    return to_html(document) if document else ""
+
+
+def render_content(md_source: str, pipeline: Pipeline | None = None) -> tuple[str, str]:
+    title = extract_title(md_source)
+    return title, _render_blocks(markdown_to_blocks(md_source), pipeline)
+
+
+def render_source(from_path: Path, pipeline: Pipeline | None = None) -> tuple[str, str]:
+    """Like ``render_content``, reading the file one block at a time."""
+    blocks = iter_blocks(from_path)
+    first_block = next(blocks, "")
+    title = extract_title(first_block)
+    return title, _render_blocks(chain([first_block], blocks), pipeline)
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import shutil
+from html import escape
+from pathlib import Path
+
+from dependencies import DependencyIndex
+
+MANIFEST_NAME = "shard-manifest.json"
+SITEMAP_NAME = "sitemap.xml"
+
+
+def parse_shard(arg: str) -> tuple[int, int]:
+    index, sep, count = arg.partition("/")
+    if not sep or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"Invalid shard, expected I/N: {arg}")
+    index, count = int(index), int(count)
+    if not 0 <= index < count:
+        raise ValueError(f"Shard index must be between 0 and {count - 1}: {arg}")
+    return index, count
+
+
+def shard_of(source: Path, shard_count: int) -> int:
+    # stable across machines and runs, unlike hash()
+    digest = hashlib.sha1(source.as_posix().encode()).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def dependencies_name(shard: tuple[int, int] | None) -> str:
+    # each shard keeps its own index, shards never overwrite the full build's
+    if shard is None:
+        return "dependencies.json"
+    return f"dependencies.shard-{shard[0]}-of-{shard[1]}.json"
+
+
+def _file_sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def write_manifest(
+    output_dir: Path,
+    shard: tuple[int, int],
+    basepath: str,
+    pages: list[tuple[Path, Path, str]],
+) -> Path:
+    """Describe every file in a shard's output dir so the fragments can be merged.
+
+    ``pages`` are ``(source, output, title)`` records relative to the content
+    and output dirs, and are kept as the metadata for cross-page artifacts.
+    """
+    files = {}
+    for dirpath, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            rel_path = path.relative_to(output_dir).as_posix()
+            if rel_path != MANIFEST_NAME:
+                files[rel_path] = _file_sha256(path)
+
+    manifest = {
+        "shard": list(shard),
+        "basepath": basepath,
+        "files": dict(sorted(files.items())),
+        "pages": sorted(
+            (
+                {"source": src.as_posix(), "output": out.as_posix(), "title": title}
+                for src, out, title in pages
+            ),
+            key=lambda page: page["output"],
+        ),
+    }
+    manifest_path = output_dir / MANIFEST_NAME
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+
+def _page_url(site_url: str, basepath: str, output: str) -> str:
+    if output == "index.html" or output.endswith("/index.html"):
+        output = output.removesuffix("index.html")
+    return site_url.rstrip("/") + basepath + output
+
+
+def merge_shards(fragment_dirs: list[Path], output_dir: Path, site_url: str = ""):
+    """Combine shard outputs into ``output_dir`` and write a sitemap for all pages.
+
+    ``output_dir`` must be empty or missing, so no file of an earlier build is
+    left behind. Raises ``ValueError`` if it is not, if the shards are
+    incomplete, disagree on the build, or two shards produced the same file.
+    """
+    if output_dir.exists() and any(output_dir.iterdir()):
+        raise ValueError(f"Merge output directory is not empty: {output_dir}")
+
+    manifests = []
+    for fragment_dir in fragment_dirs:
+        with open(fragment_dir / MANIFEST_NAME, "r") as f:
+            manifests.append(json.load(f))
+
+    shard_count = manifests[0]["shard"][1]
+    indexes = sorted(manifest["shard"][0] for manifest in manifests)
+    if indexes != list(range(shard_count)) or any(
+        manifest["shard"][1] != shard_count for manifest in manifests
+    ):
+        raise ValueError(f"Expected one fragment for each of {shard_count} shards")
+    basepath = manifests[0]["basepath"]
+    if any(manifest["basepath"] != basepath for manifest in manifests):
+        raise ValueError("Shards were built with different basepaths")
+
+    owners = {}
+    for fragment_dir, manifest in zip(fragment_dirs, manifests):
+        for rel_path in manifest["files"]:
+            if rel_path in owners:
+                raise ValueError(
+                    f"{rel_path} was produced by {owners[rel_path]} and {fragment_dir}"
+                )
+            owners[rel_path] = fragment_dir
+    if SITEMAP_NAME in owners:
+        raise ValueError(f"{SITEMAP_NAME} is generated by the merge step")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for fragment_dir, manifest in zip(fragment_dirs, manifests):
+        for rel_path, sha256 in manifest["files"].items():
+            from_path = fragment_dir / rel_path
+            if _file_sha256(from_path) != sha256:
+                raise ValueError(f"{from_path} does not match its shard manifest")
+            to_path = output_dir / rel_path
+            to_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(from_path, to_path)
+
+    outputs = sorted(page["output"] for m in manifests for page in m["pages"])
+    with open(output_dir / SITEMAP_NAME, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for output in outputs:
+            url = escape(_page_url(site_url, basepath, output), quote=False)
+            f.write(f"  <url><loc>{url}</loc></url>\n")
+        f.write("</urlset>\n")
+
+
+def merge_dependencies(
+    fragment_dirs: list[Path], output_dir: Path, cache_dir: Path
+) -> bool:
+    """Combine the shards' dependency indexes into the index of ``output_dir``.
+
+    Outputs are moved from each fragment dir to ``output_dir``. Returns False,
+    and writes nothing, if a shard's index is missing or was built for another
+    output dir, e.g. when the shard ran on another machine.
+    """
+    merged = DependencyIndex()
+    for fragment_dir in fragment_dirs:
+        with open(fragment_dir / MANIFEST_NAME, "r") as f:
+            shard = tuple(json.load(f)["shard"])
+        index_path = cache_dir / dependencies_name(shard)
+        if not index_path.exists():
+            return False
+        index = DependencyIndex.load(index_path)
+        for output, inputs in index.inputs.items():
+            if not output.is_relative_to(fragment_dir.resolve()):
+                return False
+            rel_path = output.relative_to(fragment_dir.resolve())
+            merged.record(output_dir.resolve() / rel_path, inputs)
+    merged.save(cache_dir / dependencies_name(None))
+    return True
+
+
+def main():
+    import argparse
+
+    from digest import digest_key, stamp_mtimes, write_digest
+    from main import CACHE_DIR
+    from publish import KEEP_GENERATIONS, publish, start_staging
+
+    parser = argparse.ArgumentParser(description="Merge shard outputs into one site")
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("fragment_dirs", type=Path, nargs="+")
+    parser.add_argument("--site-url", default="", help="prefix for sitemap URLs")
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=KEEP_GENERATIONS,
+        help="previous outputs to keep for rollback with publish.py",
+    )
+    args = parser.parse_args()
+    # merged into a staging dir, the served output is only replaced once complete
+    staging = start_staging(args.output_dir)
+    merge_shards(args.fragment_dirs, staging, args.site_url)
+    if not merge_dependencies(args.fragment_dirs, args.output_dir, CACHE_DIR):
+        print("Shard dependency indexes not found, the dependency index is unchanged")
+    write_digest(staging, digest_key())
+    stamp_mtimes(staging, args.output_dir)
+    publish(staging, args.output_dir, args.keep)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import mmap
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from block_markdown import markdown_to_blocks
+
+# Files smaller than this are read and split in one go, mapping them costs more
+# than it saves.
+MMAP_THRESHOLD = 1 << 20
+
+
+def _read_blocks(path: Path) -> Iterator[str]:
+    # UTF-8 like the mapped path, whatever the locale
+    with open(path, "r", encoding="utf-8") as f:
+        yield from markdown_to_blocks(f.read())
+
+
+def iter_blocks(path: Path, threshold: int = MMAP_THRESHOLD) -> Iterator[str]:
+    """Yield the same blocks as ``markdown_to_blocks`` for the file at ``path``.
+
+    Large files are memory-mapped and scanned for block boundaries as bytes,
+    and only the block being yielded is decoded, so the whole source is never
+    held as one string.
+    """
+    size = path.stat().st_size
+    if not size or size < threshold:
+        yield from _read_blocks(path)
+        return
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm.find(b"\r") != -1:
+            # text mode would translate \r\n line endings, leave that to it
+            yield from _read_blocks(path)
+            return
+
+        start = 0
+        while start <= len(mm):
+            end = mm.find(b"\n\n", start)
+            if end == -1:
+                end = len(mm)
+            if end > start:
+                # copies out and decodes this block only
+                block = mm[start:end].decode()
+                yield block.strip() if "\n" in block else block
+            start = end + 2
+
+
+def _benchmark(path: Path, threshold: int):
+    import tracemalloc
+
+    start = time.perf_counter()
+    blocks = sum(1 for _ in iter_blocks(path, threshold))
+    elapsed = time.perf_counter() - start
+
+    # measured in a second pass, tracing allocations skews the timing
+    tracemalloc.start()
+    for _ in iter_blocks(path, threshold):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {blocks} blocks in {elapsed * 1000:.1f}ms, peak {peak / 1024:.0f}KiB")
+
+
+def main():
+    # source_reader.py [size_mib], compares reading a generated page both ways
+    import tempfile
+
+    size = int(float(sys.argv[1] if len(sys.argv) > 1 else 32) * (1 << 20))
+    paragraph = "Some **bold** text with a [link](/somewhere) and `code`.\n" * 4
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "large.md"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("# Large page\n\n")
+            f.writelines(
+                f"## Section {i}\n\n{paragraph}\n"
+                for i in range(size // (len(paragraph) + 20))
+            )
+        print(f"{path.stat().st_size / (1 << 20):.1f}MiB source")
+        print("read:")
+        _benchmark(path, threshold=sys.maxsize)
+        print("mmap:")
+        _benchmark(path, threshold=0)
+
+
+if __name__ == "__main__":
+    main()
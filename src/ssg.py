@@ -0,0 +1,5 @@
+# Entry point for build.sh and main.sh. Running main.py directly compiles it as
+# __main__ on every run, importing it from here lets Python cache its bytecode.
+from main import main
+
+main()
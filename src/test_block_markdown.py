@@ -159,3 +159,92 @@ the **same** even with inline stuff
         html
         == "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>"
     )
+
+
+def test_valid_nested_unordered_list():
+    block = "- item\n  - nested item\n    1. deeper item\n- another item"
+    assert block_to_block_type(block) == BlockType.UNORDERED_LIST
+
+
+def test_invalid_mixed_top_level_list():
+    block = "- item\n1. another item"
+    assert block_to_block_type(block) == BlockType.PARAGRAPH
+
+
+def test_invalid_indented_first_list_item():
+    block = "  - item\n- another item"
+    assert block_to_block_type(block) == BlockType.PARAGRAPH
+
+
+def test_nested_lists():
+    md = """
+- This is a **list**
+  - with a nested item
+    1. and an ordered one
+  - back one level
+- and back to the top
+"""
+
+    node = markdown_to_html_node(md)
+    html = node.to_html()
+    assert (
+        html
+        == "<div><ul><li>This is a <b>list</b><ul><li>with a nested item<ol><li>and an ordered one</li></ol></li><li>back one level</li></ul></li><li>and back to the top</li></ul></div>"
+    )
+
+
+def test_nested_list_of_different_kind_at_same_level():
+    md = """
+1. first
+   - bullet
+   1. number
+"""
+
+    node = markdown_to_html_node(md)
+    html = node.to_html()
+    assert (
+        html
+        == "<div><ol><li>first<ul><li>bullet</li></ul><ol><li>number</li></ol></li></ol></div>"
+    )
+
+
+def test_valid_table():
+    block = "| a | b |\n| --- | :-: |\n| 1 | 2 |"
+    assert block_to_block_type(block) == BlockType.TABLE
+
+
+def test_invalid_table_delimiter_row():
+    block = "| a | b |\n| 1 | 2 |"
+    assert block_to_block_type(block) != BlockType.TABLE
+
+
+def test_invalid_table_column_mismatch():
+    block = "| a | b |\n| --- |"
+    assert block_to_block_type(block) != BlockType.TABLE
+
+
+def test_table():
+    md = r"""
+| Name | Ring \| Realm | Age |
+| :--- | :-----------: | --: |
+| Frodo | _One_ |
+| Gandalf | Narya | 2019 | extra |
+"""
+
+    node = markdown_to_html_node(md)
+    html = node.to_html()
+    assert html == (
+        "<div><table>"
+        '<thead><tr><th align="left">Name</th><th align="center">Ring | Realm</th><th align="right">Age</th></tr></thead>'
+        "<tbody>"
+        '<tr><td align="left">Frodo</td><td align="center"><i>One</i></td><td align="right"></td></tr>'
+        '<tr><td align="left">Gandalf</td><td align="center">Narya</td><td align="right">2019</td></tr>'
+        "</tbody></table></div>"
+    )
+
+
+def test_table_header_only():
+    node = markdown_to_html_node("| a |\n|---|")
+    assert (
+        node.to_html() == "<div><table><thead><tr><th>a</th></tr></thead></table></div>"
+    )
@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+
+from build_server import BuildServer, SiteModel, request_rebuild
+from digest import DIGEST_NAME, build_digest, load_digest
+from main import BuildTarget
+from publish import generations
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "content" / "blog").mkdir(parents=True)
+    (tmp_path / "content" / "index.md").write_text("# Home\n\nWelcome")
+    (tmp_path / "content" / "blog" / "index.md").write_text("# Blog\n\nPosts")
+    (tmp_path / "static").mkdir()
+    (tmp_path / "static" / "index.css").write_text("body {}")
+    (tmp_path / "template.html").write_text("<title>{{ Title }}</title>{{ Content }}")
+    site = SiteModel(
+        tmp_path / "content",
+        tmp_path / "template.html",
+        [BuildTarget("/", tmp_path / "out")],
+        tmp_path / "static",
+    )
+    site.load()
+    return site
+
+
+def test_site_model_load(site, tmp_path):
+    assert (tmp_path / "out" / "index.css").read_text() == "body {}"
+    assert (tmp_path / "out" / "index.html").read_text() == (
+        "<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>"
+    )
+
+
+def test_site_model_rebuild_single_page(site, tmp_path):
+    (tmp_path / "content" / "index.md").write_text("# Home\n\nUpdated")
+    written = site.rebuild([tmp_path / "content" / "index.md"])
+    assert written == [tmp_path / "out" / "index.html"]
+    assert "<p>Updated</p>" in (tmp_path / "out" / "index.html").read_text()
+
+
+def test_site_model_rebuild_template(site, tmp_path):
+    (tmp_path / "template.html").write_text("<h2>{{ Title }}</h2>{{ Content }}")
+    written = site.rebuild([tmp_path / "template.html"])
+    assert len(written) == 2
+    assert (
+        (tmp_path / "out" / "blog" / "index.html")
+        .read_text()
+        .startswith("<h2>Blog</h2>")
+    )
+
+
+def test_site_model_rebuild_deleted_page(site, tmp_path):
+    (tmp_path / "content" / "blog" / "index.md").unlink()
+    site.rebuild([tmp_path / "content" / "blog" / "index.md"])
+    assert not (tmp_path / "out" / "blog" / "index.html").exists()
+
+
+def test_site_model_rebuild_unknown_path(site, tmp_path):
+    with pytest.raises(ValueError):
+        site.rebuild([tmp_path / "elsewhere.md"])
+
+
+def test_build_server_round_trip(site, tmp_path):
+    socket_path = tmp_path / "ssg.sock"
+    with BuildServer(socket_path, site) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            response = request_rebuild([tmp_path / "content" / "index.md"], socket_path)
+            assert response["ok"]
+            assert response["written"] == [str(tmp_path / "out" / "index.html")]
+
+            response = request_rebuild([tmp_path / "missing.txt"], socket_path)
+            assert not response["ok"]
+        finally:
+            server.shutdown()
+    assert not socket_path.exists()
+
+
+def test_site_model_rebuild_partial(tmp_path):
+    (tmp_path / "content").mkdir()
+    (tmp_path / "content" / "index.md").write_text("# Home")
+    (tmp_path / "partials").mkdir()
+    (tmp_path / "partials" / "footer.html").write_text("<footer>1</footer>")
+    (tmp_path / "template.html").write_text("{{ Content }}{{> footer }}")
+    site = SiteModel(
+        tmp_path / "content",
+        tmp_path / "template.html",
+        [BuildTarget("/", tmp_path / "out")],
+        tmp_path / "static",
+    )
+    site.load()
+
+    (tmp_path / "partials" / "unused.html").write_text("<aside></aside>")
+    assert site.rebuild([tmp_path / "partials" / "unused.html"]) == []
+
+    (tmp_path / "partials" / "footer.html").write_text("<footer>2</footer>")
+    assert site.rebuild([tmp_path / "partials" / "footer.html"]) == [
+        tmp_path / "out" / "index.html"
+    ]
+    assert (tmp_path / "out" / "index.html").read_text().endswith("<footer>2</footer>")
+
+
+def test_site_model_rebuild_deleted_static_file(site, tmp_path):
+    (tmp_path / "static" / "index.css").unlink()
+    assert site.rebuild([tmp_path / "static" / "index.css"]) == []
+    assert not (tmp_path / "out" / "index.css").exists()
+
+
+def test_site_model_rebuild_is_all_or_nothing(site, tmp_path):
+    (tmp_path / "template.html").write_text("<h2>{{ Title }}</h2>{{ Content }}")
+    (tmp_path / "content" / "index.md").write_text("No title")
+    with pytest.raises(ValueError):
+        site.rebuild([tmp_path / "template.html", tmp_path / "content" / "index.md"])
+    with pytest.raises(ValueError):
+        site.rebuild([tmp_path / "template.html", tmp_path / "elsewhere.md"])
+    assert site.html_template == "<title>{{ Title }}</title>{{ Content }}"
+    assert site.pages[(tmp_path / "content" / "index.md").resolve()][0] == "Home"
+
+
+def test_site_model_load_publishes_a_new_output(site, tmp_path):
+    (tmp_path / "out" / "stale.html").write_text("stale")
+    site.load()
+    assert not (tmp_path / "out" / "stale.html").exists()
+    assert (tmp_path / "out" / "index.css").read_text() == "body {}"
+    assert generations(tmp_path / "out")
+
+
+def test_site_model_keeps_the_digest_current(site, tmp_path):
+    out = tmp_path / "out"
+    assert load_digest(out / DIGEST_NAME) == build_digest(out)
+    (tmp_path / "content" / "index.md").write_text("# Home\n\nUpdated")
+    site.rebuild([tmp_path / "content" / "index.md"])
+    assert load_digest(out / DIGEST_NAME) == build_digest(out)
+    (tmp_path / "content" / "blog" / "index.md").unlink()
+    (tmp_path / "static" / "index.css").unlink()
+    site.rebuild(
+        [tmp_path / "content" / "blog" / "index.md", tmp_path / "static" / "index.css"]
+    )
+    assert list(load_digest(out / DIGEST_NAME)["files"]) == ["index.html"]
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from dependencies import DependencyIndex
+
+
+def test_affected():
+    index = DependencyIndex()
+    index.record("a.html", ["a.md", "template.html", "header.html"])
+    index.record("b.html", ["b.md", "template.html"])
+    assert index.affected(["header.html"]) == {"a.html"}
+    assert index.affected(["template.html"]) == {"a.html", "b.html"}
+    assert index.affected(["b.md", "c.md"]) == {"b.html"}
+
+
+def test_record_replaces_inputs():
+    index = DependencyIndex()
+    index.record("a.html", ["a.md", "header.html"])
+    index.record("a.html", ["a.md"])
+    assert index.affected(["header.html"]) == set()
+    assert "header.html" not in index.dependents
+
+
+def test_forget():
+    index = DependencyIndex()
+    index.record("a.html", ["a.md"])
+    index.forget("a.html")
+    assert index.affected(["a.md"]) == set()
+    assert index.inputs == {}
+
+
+def test_save_load(tmp_path):
+    index = DependencyIndex()
+    index.record(tmp_path / "a.html", [tmp_path / "a.md", tmp_path / "t.html"])
+    index.save(tmp_path / "cache" / "dependencies.json")
+    loaded = DependencyIndex.load(tmp_path / "cache" / "dependencies.json")
+    assert loaded.inputs == index.inputs
+    assert loaded.affected([Path(tmp_path / "t.html")]) == {tmp_path / "a.html"}
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+from digest import (
+    DIGEST_NAME,
+    build_digest,
+    diff_digests,
+    load_digest,
+    stamp_mtimes,
+    stamp_rebuilt,
+    update_digest,
+    write_digest,
+)
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    (tmp_path / "out" / "blog").mkdir(parents=True)
+    (tmp_path / "out" / "index.html").write_text("home")
+    (tmp_path / "out" / "blog" / "index.html").write_text("blog")
+    return tmp_path / "out"
+
+
+def test_build_digest_lists_every_file(output_dir):
+    write_digest(output_dir)
+    digest = build_digest(output_dir)
+    assert list(digest["files"]) == ["blog/index.html", "index.html"]
+    assert digest["algorithm"] == "sha256"
+
+
+def test_build_digest_is_reproducible(output_dir, tmp_path):
+    (tmp_path / "copy").mkdir()
+    (tmp_path / "copy" / "index.html").write_text("home")
+    (tmp_path / "copy" / "blog").mkdir()
+    (tmp_path / "copy" / "blog" / "index.html").write_text("blog")
+    assert build_digest(output_dir, b"key") == build_digest(tmp_path / "copy", b"key")
+
+
+def test_load_digest_signed(output_dir):
+    write_digest(output_dir, b"key")
+    assert load_digest(output_dir / DIGEST_NAME, b"key")["algorithm"] == "hmac-sha256"
+    with pytest.raises(ValueError):
+        load_digest(output_dir / DIGEST_NAME, b"other key")
+    with pytest.raises(ValueError):
+        load_digest(output_dir / DIGEST_NAME)
+
+
+def test_load_digest_rejects_unsigned_when_key_given(output_dir):
+    write_digest(output_dir)
+    load_digest(output_dir / DIGEST_NAME)
+    with pytest.raises(ValueError):
+        load_digest(output_dir / DIGEST_NAME, b"key")
+
+
+def test_update_digest(output_dir):
+    write_digest(output_dir, b"key")
+    (output_dir / "index.html").write_text("new home")
+    (output_dir / "blog" / "index.html").unlink()
+    (output_dir / "about.html").write_text("about")
+    update_digest(
+        output_dir,
+        [
+            output_dir / "index.html",
+            output_dir / "blog" / "index.html",
+            output_dir / "about.html",
+        ],
+        b"key",
+    )
+    digest = load_digest(output_dir / DIGEST_NAME, b"key")
+    assert digest == build_digest(output_dir, b"key")
+    assert list(digest["files"]) == ["about.html", "index.html"]
+
+
+def test_update_digest_without_digest(output_dir):
+    update_digest(output_dir, [])
+    assert load_digest(output_dir / DIGEST_NAME) == build_digest(output_dir)
+
+
+def test_diff_digests(output_dir):
+    old = build_digest(output_dir)
+    (output_dir / "index.html").write_text("new home")
+    (output_dir / "blog" / "index.html").unlink()
+    (output_dir / "about.html").write_text("about")
+    changed, removed = diff_digests(old, build_digest(output_dir))
+    assert sorted(changed) == ["about.html", "index.html"]
+    assert removed == ["blog/index.html"]
+
+
+def test_stamp_mtimes(output_dir, tmp_path):
+    previous_dir = tmp_path / "previous"
+    (previous_dir / "blog").mkdir(parents=True)
+    (previous_dir / "index.html").write_text("home")
+    (previous_dir / "blog" / "index.html").write_text("BLOG")
+    os.utime(previous_dir / "index.html", (1_600_000_000, 1_600_000_000))
+    os.utime(previous_dir / "blog" / "index.html", (1_600_000_000, 1_600_000_000))
+
+    stamp_mtimes(output_dir, previous_dir, 1_700_000_000)
+    assert os.stat(output_dir / "index.html").st_mtime == 1_600_000_000
+    # same size, different bytes
+    assert os.stat(output_dir / "blog" / "index.html").st_mtime == 1_700_000_000
+
+
+def test_stamp_mtimes_defaults_to_build_time(output_dir, monkeypatch):
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    os.utime(output_dir / "index.html", (0, 0))
+    stamp_mtimes(output_dir)
+    assert os.stat(output_dir / "index.html").st_mtime > 1_700_000_000
+
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    stamp_mtimes(output_dir)
+    assert os.stat(output_dir / "index.html").st_mtime == 1_700_000_000
+
+
+def test_stamp_rebuilt(output_dir):
+    stamp_rebuilt([output_dir / "index.html"], 1_700_000_000)
+    assert os.stat(output_dir / "index.html").st_mtime == 1_700_000_000
+    assert os.stat(output_dir / "blog" / "index.html").st_mtime != 1_700_000_000
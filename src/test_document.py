@@ -0,0 +1,117 @@
+import sys
+
+import pytest
+
+from block_markdown import markdown_to_document, markdown_to_html_node
+from document import ANY_TAG, Pipeline, dumps, load_plugins, loads, to_html
+from render import render_content
+
+MD = """# Title
+
+A [link](https://example.com) and an [internal one](/blog)
+
+- item
+"""
+
+
+def test_parser_builds_tuples():
+    assert markdown_to_document("Hi [x](/)") == (
+        "div",
+        None,
+        None,
+        (
+            (
+                "p",
+                None,
+                None,
+                ((None, "Hi ", None, None), ("a", "x", {"href": "/"}, None)),
+            ),
+        ),
+    )
+
+
+def test_to_html_matches_html_nodes():
+    document = markdown_to_document(MD)
+    assert to_html(document) == markdown_to_html_node(MD).to_html()
+    assert to_html(document) == render_content(MD)[1]
+
+
+def test_dumps_loads():
+    document = markdown_to_document(
+        MD + "\n| a | b |\n|---|:-:|\n| 1 | `2` |\n\n- x\n  - y\n    1. z\n- w\n"
+    )
+    assert loads(dumps(document)) == document
+    assert to_html(loads(dumps(document))) == to_html(document)
+
+
+def test_pipeline_without_transforms_is_identity():
+    document = markdown_to_document(MD)
+    assert Pipeline().run(document) is document
+
+
+def test_pipeline_transforms_by_tag():
+    pipeline = Pipeline()
+
+    @pipeline.transform("a")
+    def external_links(node):
+        tag, value, props, children = node
+        if props["href"].startswith("http"):
+            props = {**props, "target": "_blank"}
+        return (tag, value, props, children)
+
+    @pipeline.transform("li")
+    def drop_list_items(node):
+        return None
+
+    html = to_html(pipeline.run(markdown_to_document(MD)))
+    assert '<a href="https://example.com" target="_blank">link</a>' in html
+    assert '<a href="/blog">internal one</a>' in html
+    assert "<ul></ul>" in html
+
+
+def test_pipeline_runs_all_transforms_in_one_traversal():
+    visits = []
+    pipeline = Pipeline()
+
+    @pipeline.transform()
+    def first(node):
+        visits.append(("first", node[0]))
+        return node
+
+    @pipeline.transform(ANY_TAG)
+    def second(node):
+        visits.append(("second", node[0]))
+        return node
+
+    pipeline.run(("div", None, None, (("p", "x", None, None),)))
+    assert visits == [
+        ("first", "p"),
+        ("second", "p"),
+        ("first", "div"),
+        ("second", "div"),
+    ]
+
+
+def test_render_content_with_pipeline():
+    pipeline = Pipeline()
+
+    @pipeline.transform("h1")
+    def demote(node):
+        return ("h2",) + node[1:]
+
+    assert render_content(MD, pipeline)[1].startswith("<div><h2>Title</h2>")
+
+
+def test_load_plugins(tmp_path, monkeypatch):
+    (tmp_path / "demote_plugin.py").write_text(
+        "def register(pipeline):\n"
+        "    pipeline.transform('h1')(lambda node: ('h2',) + node[1:])\n"
+    )
+    (tmp_path / "empty_plugin.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "modules", dict(sys.modules))
+
+    pipeline = load_plugins(["demote_plugin"])
+    assert render_content(MD, pipeline)[1].startswith("<div><h2>Title</h2>")
+    with pytest.raises(ValueError):
+        load_plugins(["empty_plugin"])
@@ -0,0 +1,97 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import metrics
+from fragments import RENDERER_MODULES, FragmentCache
+from main import BuildTarget, generate_site
+from render import render_source
+
+
+def _counter(result):
+    return metrics._counters.get(
+        ("cache", (("cache", "fragments"), ("result", result))), 0
+    )
+
+
+def test_fragment_cache_matches_render_source(tmp_path):
+    path = tmp_path / "page.md"
+    path.write_text("# Page\n\nSome *text*.")
+    metrics.reset()
+    cache = FragmentCache(tmp_path / "fragments", "v1")
+    assert cache.render(path) == render_source(path)
+    assert FragmentCache(tmp_path / "fragments", "v1").render(path) == render_source(
+        path
+    )
+    assert (_counter("hit"), _counter("miss")) == (1, 1)
+
+    path.write_text("# Page\n\nOther text.")
+    assert cache.render(path) == ("Page", "<div><h1>Page</h1><p>Other text.</p></div>")
+    assert FragmentCache(tmp_path / "fragments", "v2").render(path) == render_source(
+        path
+    )
+    assert (_counter("hit"), _counter("miss")) == (1, 3)
+
+
+def test_template_change_rewraps_cached_fragments(tmp_path):
+    content = tmp_path / "content"
+    content.mkdir()
+    (content / "index.md").write_text("# Home\n\nHello.")
+    template = tmp_path / "template.html"
+    targets = [BuildTarget("/", tmp_path / "out")]
+
+    template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+    generate_site(
+        content, template, targets, fragments=FragmentCache(tmp_path / "f", "v1")
+    )
+    metrics.reset()
+    template.write_text("<title>{{ Title }}</title>{{ Content }}")
+    generate_site(
+        content, template, targets, fragments=FragmentCache(tmp_path / "f", "v1")
+    )
+    assert (_counter("hit"), _counter("miss")) == (1, 0)
+    assert (tmp_path / "out" / "index.html").read_text() == (
+        "<title>Home</title><div><h1>Home</h1><p>Hello.</p></div>"
+    )
+
+
+def test_prune(tmp_path):
+    kept = tmp_path / "kept.md"
+    kept.write_text("# Kept")
+    edited = tmp_path / "edited.md"
+    edited.write_text("# Before")
+    FragmentCache(tmp_path / "fragments", "v0").render(kept)
+    cache = FragmentCache(tmp_path / "fragments", "v1")
+    cache.render(kept)
+    cache.render(edited)
+    edited.write_text("# After")
+
+    cache = FragmentCache(tmp_path / "fragments", "v1")
+    cache.render(kept)
+    cache.render(edited)
+    cache.prune()
+    assert [path.name for path in (tmp_path / "fragments").iterdir()] == ["v1"]
+    assert len(list(cache.dir.iterdir())) == 2
+
+
+def test_renderer_modules_cover_render_imports():
+    # modules render imports that cannot change the rendered content
+    not_rendering = {"metrics.py", "htmlnode.py"}
+    src_dir = Path(__file__).parent
+    code = (
+        "import render, sys\n"
+        "print(*[getattr(m, '__file__', None) for m in sys.modules.values()], sep='\\n')"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=src_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported = {
+        Path(path).name
+        for path in result.stdout.splitlines()
+        if path != "None" and Path(path).parent == src_dir
+    }
+    assert imported - not_rendering == set(RENDERER_MODULES)
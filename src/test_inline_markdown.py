@@ -206,3 +206,47 @@ def test_text_to_textnodes_smoke():
         TextNode(" and a ", TextType.TEXT),
         TextNode("link", TextType.LINK, "https://boot.dev"),
     ]
+
+
+def test_split_nodes_delimiter_italic_ignores_snake_case():
+    nodes = _split_nodes_delimiter(
+        [TextNode("call snake_case_name or _this_", TextType.TEXT)],
+        "_",
+        TextType.ITALIC,
+    )
+    assert nodes == [
+        TextNode("call snake_case_name or ", TextType.TEXT),
+        TextNode("this", TextType.ITALIC),
+        TextNode("", TextType.TEXT),
+    ]
+
+
+def test_split_nodes_delimiter_italic_ignores_urls():
+    text = "see [docs](https://e.com/_private/) for _more_"
+    nodes = _split_nodes_delimiter(
+        [TextNode(text, TextType.TEXT)], "_", TextType.ITALIC
+    )
+    assert nodes == [
+        TextNode("see [docs](https://e.com/_private/) for ", TextType.TEXT),
+        TextNode("more", TextType.ITALIC),
+        TextNode("", TextType.TEXT),
+    ]
+
+
+def test_split_nodes_delimiter_italic_stray_underscore():
+    nodes = _split_nodes_delimiter(
+        [TextNode("a stray _ underscore", TextType.TEXT)], "_", TextType.ITALIC
+    )
+    assert nodes == [TextNode("a stray _ underscore", TextType.TEXT)]
+
+
+def test_split_nodes_link_dense():
+    text = "".join(f"[l{i}](u{i}) " for i in range(3))
+    assert _split_nodes_link([TextNode(text, TextType.TEXT)]) == [
+        TextNode("l0", TextType.LINK, "u0"),
+        TextNode(" ", TextType.TEXT),
+        TextNode("l1", TextType.LINK, "u1"),
+        TextNode(" ", TextType.TEXT),
+        TextNode("l2", TextType.LINK, "u2"),
+        TextNode(" ", TextType.TEXT),
+    ]
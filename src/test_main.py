@@ -1,6 +1,21 @@
+import subprocess
+import sys
+
 import pytest
 
-from main import extract_title
+from dependencies import DependencyIndex
+from main import (
+    DOCS_DIR,
+    ROOT_DIR,
+    BuildTarget,
+    apply_basepath,
+    find_pages,
+    generate_site,
+    load_template,
+    parse_target,
+    write_page,
+)
+from render import extract_title
 
 
 def test_extract_title():
@@ -10,3 +25,177 @@ def test_extract_title():
 
 def test_extract_title_with_title():
     assert extract_title("# Hello, World!") == "Hello, World!"
+
+
+def test_parse_target_default_output_dir():
+    assert parse_target("/ssg/") == BuildTarget("/ssg/", DOCS_DIR)
+
+
+def test_parse_target_with_output_dir():
+    assert parse_target("/=public") == BuildTarget("/", ROOT_DIR / "public")
+
+
+def test_parse_target_empty_basepath():
+    with pytest.raises(ValueError):
+        parse_target("=public")
+
+
+@pytest.mark.parametrize("arg", ["/ssg/=", "/=.", "/=./", "/=src", "/=content", "/=.."])
+def test_parse_target_empty_output_dir(arg):
+    with pytest.raises(ValueError):
+        parse_target(arg)
+
+
+def test_apply_basepath():
+    html = '<a href="/blog">x</a><img src="/a.png">'
+    assert apply_basepath(html, "/") == html
+    assert (
+        apply_basepath(html, "/ssg/")
+        == '<a href="/ssg/blog">x</a><img src="/ssg/a.png">'
+    )
+
+
+def test_generate_site_multiple_targets(tmp_path):
+    content = tmp_path / "content"
+    (content / "blog").mkdir(parents=True)
+    (content / "index.md").write_text("# Home\n\n[Blog](/blog/)")
+    (content / "blog" / "index.md").write_text("# Blog\n\nPosts")
+    template = tmp_path / "template.html"
+    template.write_text(
+        '<title>{{ Title }}</title><link href="/index.css">{{ Content }}'
+    )
+
+    generate_site(
+        content,
+        template,
+        [
+            BuildTarget("/", tmp_path / "prod"),
+            BuildTarget("/staging/", tmp_path / "staging"),
+        ],
+    )
+
+    assert (tmp_path / "prod" / "index.html").read_text() == (
+        '<title>Home</title><link href="/index.css">'
+        '<div><h1>Home</h1><p><a href="/blog/">Blog</a></p></div>'
+    )
+    assert (tmp_path / "staging" / "index.html").read_text() == (
+        '<title>Home</title><link href="/staging/index.css">'
+        '<div><h1>Home</h1><p><a href="/staging/blog/">Blog</a></p></div>'
+    )
+    assert (tmp_path / "staging" / "blog" / "index.html").exists()
+
+
+def test_generate_site_shared_output_dir(tmp_path):
+    with pytest.raises(ValueError):
+        generate_site(
+            tmp_path,
+            tmp_path / "template.html",
+            [BuildTarget("/", tmp_path), BuildTarget("/ssg/", tmp_path)],
+        )
+
+
+# Import-time budget for the CLI, in microseconds of CPU time.
+IMPORT_TIME_BUDGET_US = 100_000
+
+
+def _run_in_src(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT_DIR / "src",
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+def test_import_time_budget():
+    _run_in_src("import main")  # warm the bytecode cache
+    # CPU time, which other processes on the machine inflate far less than
+    # wall time, and the fastest of several runs
+    code = (
+        "import time; start = time.process_time(); import main; "
+        "print(int((time.process_time() - start) * 1e6))"
+    )
+    assert min(int(_run_in_src(code)) for _ in range(5)) < IMPORT_TIME_BUDGET_US
+
+
+def test_import_defers_cli_only_modules():
+    result = _run_in_src(
+        "import main, sys; "
+        "print(sorted({'argparse', 'shutil', 'sharding'} & set(sys.modules)))"
+    )
+    assert result.strip() == "[]"
+
+
+def test_load_template_partials(tmp_path):
+    (tmp_path / "partials" / "nav").mkdir(parents=True)
+    (tmp_path / "partials" / "header.html").write_text(
+        "<header>{{> nav/links }}</header>"
+    )
+    (tmp_path / "partials" / "nav" / "links.html").write_text('<a href="/">Home</a>')
+    (tmp_path / "template.html").write_text("{{> header }}{{ Content }}")
+
+    html_template, inputs = load_template(tmp_path / "template.html")
+    assert html_template == '<header><a href="/">Home</a></header>{{ Content }}'
+    assert inputs == [
+        tmp_path / "template.html",
+        tmp_path / "partials" / "header.html",
+        tmp_path / "partials" / "nav" / "links.html",
+    ]
+
+
+def test_load_template_recursive_partial(tmp_path):
+    (tmp_path / "partials").mkdir()
+    (tmp_path / "partials" / "loop.html").write_text("{{> loop }}")
+    (tmp_path / "template.html").write_text("{{> loop }}")
+    with pytest.raises(ValueError):
+        load_template(tmp_path / "template.html")
+
+
+def test_generate_site_records_dependencies(tmp_path):
+    (tmp_path / "content").mkdir()
+    (tmp_path / "content" / "index.md").write_text("# Home")
+    (tmp_path / "partials").mkdir()
+    (tmp_path / "partials" / "footer.html").write_text("<footer></footer>")
+    (tmp_path / "template.html").write_text("{{ Content }}{{> footer }}")
+
+    dependencies = DependencyIndex()
+    generate_site(
+        tmp_path / "content",
+        tmp_path / "template.html",
+        [BuildTarget("/", tmp_path / "out")],
+        dependencies=dependencies,
+    )
+    assert dependencies.affected([tmp_path / "partials" / "footer.html"]) == {
+        tmp_path / "out" / "index.html"
+    }
+
+
+def test_find_pages_is_sorted(tmp_path):
+    for name in ["b", "a", "c"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "index.md").write_text(f"# {name}")
+    (tmp_path / "z.md").write_text("# z")
+    (tmp_path / "notes.txt").write_text("not a page")
+    assert [page.relative_to(tmp_path).as_posix() for page in find_pages(tmp_path)] == [
+        "a/index.md",
+        "b/index.md",
+        "c/index.md",
+        "z.md",
+    ]
+
+
+def test_write_page_reuses_unchanged_file(tmp_path):
+    previous = tmp_path / "previous" / "index.html"
+    write_page("<p>same</p>", previous)
+    assert write_page("<p>same</p>", tmp_path / "staging" / "index.html", previous)
+    assert not write_page("<p>new</p>", tmp_path / "staging" / "other.html", previous)
+    assert previous.read_text() == "<p>same</p>"
+
+
+def test_write_page_replaces_linked_file(tmp_path):
+    previous = tmp_path / "previous.html"
+    write_page("<p>v1</p>", previous)
+    write_page("<p>v1</p>", tmp_path / "current.html", previous)
+    write_page("<p>v2</p>", tmp_path / "current.html")
+    assert previous.read_text() == "<p>v1</p>"
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+import metrics
+from block_markdown import markdown_to_html_node
+from main import write_page
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _values():
+    return {
+        (name, tuple(labels.items())): value
+        for name, labels, value in metrics.samples()
+    }
+
+
+def test_incr():
+    metrics.incr("pages", result="built")
+    metrics.incr("pages", result="built")
+    metrics.incr("bytes_written", 100)
+    values = _values()
+    assert values[("pages_total", (("result", "built"),))] == 2
+    assert values[("bytes_written_total", ())] == 100
+
+
+def test_phase_accumulates():
+    with metrics.phase("render"):
+        pass
+    with metrics.phase("render"):
+        pass
+    assert _values()[("phase_duration_seconds", (("phase", "render"),))] >= 0
+
+
+def test_peak_rss_is_reported():
+    assert _values()[("peak_rss_bytes", ())] > 0
+
+
+def test_to_prometheus():
+    metrics.incr("pages", result="built")
+    metrics.incr("pages", result="skipped", value=2)
+    text = metrics.to_prometheus()
+    assert (
+        "# TYPE ssg_pages_total counter\n"
+        'ssg_pages_total{result="built"} 1\n'
+        'ssg_pages_total{result="skipped"} 2\n'
+    ) in text
+    assert "# TYPE ssg_peak_rss_bytes gauge\n" in text
+
+
+def test_to_jsonl():
+    metrics.incr("bytes_written", 10)
+    lines = [json.loads(line) for line in metrics.to_jsonl(123.0).splitlines()]
+    assert lines[0] == {
+        "timestamp": 123.0,
+        "metric": "ssg_bytes_written_total",
+        "labels": {},
+        "value": 10,
+    }
+
+
+def test_write(tmp_path):
+    metrics.incr("pages", result="built")
+    metrics.write(tmp_path / "metrics.prom")
+    metrics.write(tmp_path / "metrics.jsonl")
+    metrics.write(tmp_path / "metrics.jsonl")
+    assert "ssg_pages_total" in (tmp_path / "metrics.prom").read_text()
+    jsonl = (tmp_path / "metrics.jsonl").read_text().splitlines()
+    assert len(jsonl) == 2 * len(metrics.samples())
+
+
+def test_metrics_path_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        metrics.metrics_path("metrics.txt")
+
+
+def test_parser_and_writer_report():
+    markdown_to_html_node("# Title\n\nA paragraph")
+    assert _values()[("blocks_parsed_total", (("type", "heading"),))] == 1
+    assert _values()[("blocks_parsed_total", (("type", "paragraph"),))] == 1
+
+
+def test_write_page_reports(tmp_path):
+    write_page("<p>x</p>", tmp_path / "a.html")
+    write_page("<p>x</p>", tmp_path / "b.html", tmp_path / "a.html")
+    values = _values()
+    assert values[("pages_total", (("result", "built"),))] == 1
+    assert values[("pages_total", (("result", "skipped"),))] == 1
+    assert values[("bytes_written_total", ())] == len("<p>x</p>")
@@ -0,0 +1,122 @@
+from pathlib import Path
+
+import pytest
+
+import metrics
+from main import BuildTarget
+from pagination import SummaryCache, generate_collection, parse_per_page, summarize
+
+
+def _write_post(content, name, body):
+    path = content / "blog" / name / "index.md"
+    path.parent.mkdir(parents=True)
+    path.write_text(body)
+    return path
+
+
+def test_summarize(tmp_path):
+    path = tmp_path / "post.md"
+    path.write_text(
+        "# Post\n\n[< Back Home](/)\n\nDate: 2024-05-01\n\n"
+        "First **paragraph**.\n\nSecond paragraph."
+    )
+    summary = summarize(path, Path("blog/post/index.md"))
+    assert summary.title == "Post"
+    assert summary.url == "/blog/post/"
+    assert summary.date == "2024-05-01"
+    assert summary.summary == "<p>First <b>paragraph</b>.</p>"
+
+
+def test_summary_cache_hits_unchanged_pages(tmp_path):
+    path = _write_post(tmp_path, "a", "# A\n\nOne.")
+    metrics.reset()
+    cache = SummaryCache(tmp_path / "summaries.json")
+    cache.summary(path, path.relative_to(tmp_path))
+    cache.save()
+
+    cache = SummaryCache(tmp_path / "summaries.json")
+    assert cache.summary(path, path.relative_to(tmp_path)).summary == "<p>One.</p>"
+    path.write_text("# A\n\nTwo.")
+    assert cache.summary(path, path.relative_to(tmp_path)).summary == "<p>Two.</p>"
+    assert (
+        metrics._counters[("cache", (("cache", "summaries"), ("result", "hit")))] == 1
+    )
+    assert (
+        metrics._counters[("cache", (("cache", "summaries"), ("result", "miss")))] == 2
+    )
+
+
+def test_summary_cache_misses_after_renderer_change(tmp_path):
+    path = _write_post(tmp_path, "a", "# A\n\nOne.")
+    cache = SummaryCache(tmp_path / "summaries.json", fingerprint="old")
+    cache.summary(path, path.relative_to(tmp_path))
+    cache.save()
+
+    metrics.reset()
+    cache = SummaryCache(tmp_path / "summaries.json", fingerprint="new")
+    cache.summary(path, path.relative_to(tmp_path))
+    assert (
+        metrics._counters[("cache", (("cache", "summaries"), ("result", "miss")))] == 1
+    )
+    assert cache.entries["blog/a/index.md"]["fingerprint"] == "new"
+
+
+def test_generate_collection(tmp_path):
+    content = tmp_path / "content"
+    (content / "blog").mkdir(parents=True)
+    (content / "blog" / "index.md").write_text("# Blog")
+    for day in range(1, 4):
+        _write_post(content, f"p{day}", f"# Post {day}\n\nDate: 2024-05-0{day}")
+    template = tmp_path / "template.html"
+    template.write_text("<title>{{ Title }}</title>{{ Content }}")
+
+    pages = generate_collection(
+        content,
+        "blog",
+        template,
+        [BuildTarget("/site/", tmp_path / "out")],
+        SummaryCache(tmp_path / "summaries.json"),
+        per_page=2,
+    )
+    assert [page.output.as_posix() for page in pages] == [
+        "blog/page/1/index.html",
+        "blog/page/2/index.html",
+    ]
+    first = (tmp_path / "out/blog/page/1/index.html").read_text()
+    assert first.index("Post 3") < first.index("Post 2")
+    assert "Post 1" not in first
+    assert '<a href="/site/blog/page/2/">Older</a>' in first
+    second = (tmp_path / "out/blog/page/2/index.html").read_text()
+    assert "Post 1" in second
+    assert '<a href="/site/blog/page/1/">Newer</a>' in second
+    assert "Older" not in second
+
+
+def test_summarize_rejects_non_iso_dates(tmp_path):
+    path = tmp_path / "post.md"
+    path.write_text("# Post\n\nDate: May 1, 2024\n\nText.")
+    with pytest.raises(ValueError):
+        summarize(path, Path("post.md"))
+
+
+def test_summary_cache_drops_deleted_pages(tmp_path):
+    kept = _write_post(tmp_path, "kept", "# Kept")
+    deleted = _write_post(tmp_path, "deleted", "# Deleted")
+    cache = SummaryCache(tmp_path / "summaries.json")
+    cache.summary(kept, kept.relative_to(tmp_path))
+    cache.summary(deleted, deleted.relative_to(tmp_path))
+    cache.save()
+
+    cache = SummaryCache(tmp_path / "summaries.json")
+    cache.summary(kept, kept.relative_to(tmp_path))
+    cache.save()
+    assert list(SummaryCache(tmp_path / "summaries.json").entries) == [
+        "blog/kept/index.md"
+    ]
+
+
+def test_parse_per_page():
+    assert parse_per_page("20") == 20
+    for arg in ["0", "-1", "x"]:
+        with pytest.raises(ValueError):
+            parse_per_page(arg)
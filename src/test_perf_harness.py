@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from inline_markdown import text_to_textnodes
+from perf_harness import (
+    ADVERSARIAL_UNITS,
+    INTENDED_DIFFERENCES,
+    MAX_GROWTH,
+    fuzz,
+    growth,
+    inline_or_none,
+    load_corpus,
+    random_markdown,
+    reference_mismatch,
+    reference_text_to_textnodes,
+)
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("unit", ADVERSARIAL_UNITS.values(), ids=ADVERSARIAL_UNITS)
+def test_adversarial_input_parses_in_linear_time(unit):
+    assert growth(unit) < MAX_GROWTH
+
+
+CORPUS = load_corpus()
+
+
+def test_corpus_is_not_empty():
+    assert CORPUS
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("unit", CORPUS.values(), ids=CORPUS)
+def test_corpus_input_parses_in_linear_time(unit):
+    assert growth(unit) < MAX_GROWTH
+
+
+def test_inline_parser_matches_reference():
+    rng = random.Random(0)
+    for _ in range(500):
+        text = random_markdown(rng, rng.randint(1, 60))
+        assert reference_mismatch(text) is None, text
+
+
+@pytest.mark.parametrize(
+    "text, difference",
+    [
+        ("[a [b](c)", "nested_brackets"),
+        ("![a](b (c))", "nested_brackets"),
+        ("snake_case_name", "word_underscores"),
+        ("[a](/_b_)", "url_underscores"),
+        ("a trailing _", "unpaired_underscore"),
+    ],
+)
+def test_intended_differences_are_needed(text, difference):
+    others = [name for name in INTENDED_DIFFERENCES if name != difference]
+    assert inline_or_none(text_to_textnodes, text) == reference_text_to_textnodes(text)
+    assert inline_or_none(text_to_textnodes, text) != inline_or_none(
+        lambda text: reference_text_to_textnodes(text, others), text
+    )
+
+
+def test_unintended_difference_is_reported(monkeypatch):
+    monkeypatch.setattr("perf_harness.text_to_textnodes", lambda text: [])
+    assert reference_mismatch("a [link](/b)") is not None
+
+
+@pytest.mark.perf
+def test_fuzz_finds_nothing(tmp_path):
+    assert fuzz(5, seed=0, corpus_dir=tmp_path) == []
+    assert list(tmp_path.iterdir()) == []
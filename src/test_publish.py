@@ -0,0 +1,115 @@
+import os
+
+import pytest
+
+import publish
+from publish import (
+    copy_or_link,
+    generations,
+    link_if_unchanged,
+    rollback,
+    staging_dir,
+    start_staging,
+)
+
+
+def _build(output_dir, text):
+    staging = start_staging(output_dir)
+    (staging / "index.html").write_text(text)
+    publish.publish(staging, output_dir, keep=2)
+
+
+def test_publish_first_build(tmp_path):
+    _build(tmp_path / "out", "v1")
+    assert (tmp_path / "out" / "index.html").read_text() == "v1"
+    assert not staging_dir(tmp_path / "out").exists()
+    assert generations(tmp_path / "out") == []
+
+
+def test_publish_keeps_generations(tmp_path):
+    for version in ["v1", "v2", "v3", "v4"]:
+        _build(tmp_path / "out", version)
+    assert (tmp_path / "out" / "index.html").read_text() == "v4"
+    assert [
+        (generation / "index.html").read_text()
+        for generation in generations(tmp_path / "out")
+    ] == ["v2", "v3"]
+
+
+def test_publish_without_rename_exchange(tmp_path, monkeypatch):
+    monkeypatch.setattr(publish, "_rename_exchange", lambda a, b: False)
+    _build(tmp_path / "out", "v1")
+    _build(tmp_path / "out", "v2")
+    assert (tmp_path / "out" / "index.html").read_text() == "v2"
+    assert len(generations(tmp_path / "out")) == 1
+
+
+def test_start_staging_clears_crashed_build(tmp_path):
+    staging = start_staging(tmp_path / "out")
+    (staging / "half-written.html").write_text("")
+    assert list(start_staging(tmp_path / "out").iterdir()) == []
+
+
+def test_rollback(tmp_path):
+    _build(tmp_path / "out", "v1")
+    _build(tmp_path / "out", "v2")
+    rollback(tmp_path / "out")
+    assert (tmp_path / "out" / "index.html").read_text() == "v1"
+    assert generations(tmp_path / "out") == []
+    with pytest.raises(ValueError):
+        rollback(tmp_path / "out")
+
+
+@pytest.mark.parametrize(
+    "output_dir",
+    [
+        publish.ROOT_DIR,
+        publish.ROOT_DIR.parent,
+        publish.ROOT_DIR / "src",
+        publish.ROOT_DIR / "content",
+        publish.ROOT_DIR / "content" / "..",
+        publish.ROOT_DIR / "static",
+    ],
+)
+def test_refuses_source_output_dir(output_dir):
+    with pytest.raises(ValueError):
+        start_staging(output_dir)
+    with pytest.raises(ValueError):
+        publish.publish(output_dir.parent / "staging", output_dir)
+    with pytest.raises(ValueError):
+        rollback(output_dir)
+
+
+def test_link_if_unchanged(tmp_path):
+    (tmp_path / "previous.html").write_bytes(b"same")
+    assert link_if_unchanged(tmp_path / "previous.html", b"same", tmp_path / "a.html")
+    assert os.path.samefile(tmp_path / "previous.html", tmp_path / "a.html")
+    assert not link_if_unchanged(
+        tmp_path / "previous.html", b"diff", tmp_path / "b.html"
+    )
+    assert not link_if_unchanged(tmp_path / "missing.html", b"", tmp_path / "c.html")
+    assert not (tmp_path / "b.html").exists()
+
+
+def test_copy_or_link(tmp_path):
+    for name in ["static", "previous", "staging"]:
+        (tmp_path / name).mkdir()
+    (tmp_path / "static" / "same.css").write_text("a")
+    (tmp_path / "static" / "new.css").write_text("b")
+    (tmp_path / "previous" / "same.css").write_text("a")
+    (tmp_path / "previous" / "new.css").write_text("old")
+    linked = [
+        copy_or_link(
+            str(tmp_path / "static" / name),
+            str(tmp_path / "staging" / name),
+            tmp_path / "previous",
+            tmp_path / "staging",
+        )
+        for name in ["same.css", "new.css"]
+    ]
+    assert linked == [True, False]
+    assert os.path.samefile(
+        tmp_path / "previous" / "same.css", tmp_path / "staging" / "same.css"
+    )
+    assert (tmp_path / "staging" / "new.css").read_text() == "b"
+    assert (tmp_path / "previous" / "new.css").read_text() == "old"
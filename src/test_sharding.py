@@ -0,0 +1,114 @@
+from pathlib import Path
+
+import pytest
+
+from dependencies import DependencyIndex
+from main import BuildTarget, generate_site
+from sharding import (
+    MANIFEST_NAME,
+    SITEMAP_NAME,
+    dependencies_name,
+    merge_dependencies,
+    merge_shards,
+    parse_shard,
+    shard_of,
+    write_manifest,
+)
+
+
+def test_parse_shard():
+    assert parse_shard("1/4") == (1, 4)
+
+
+@pytest.mark.parametrize("arg", ["4/4", "1", "a/2", "-1/2", "0/0"])
+def test_parse_shard_invalid(arg):
+    with pytest.raises(ValueError):
+        parse_shard(arg)
+
+
+def test_shard_of_is_stable():
+    assert shard_of(Path("blog/tom/index.md"), 4) == shard_of(
+        Path("blog/tom/index.md"), 4
+    )
+    assert {shard_of(Path(f"page{i}.md"), 3) for i in range(30)} == {0, 1, 2}
+
+
+def _build_shards(tmp_path, shard_count):
+    content = tmp_path / "content"
+    for i in range(10):
+        (content / f"page{i}").mkdir(parents=True)
+        (content / f"page{i}" / "index.md").write_text(f"# Page {i}\n\nBody")
+    template = tmp_path / "template.html"
+    template.write_text("{{ Title }}{{ Content }}")
+
+    fragment_dirs = []
+    for index in range(shard_count):
+        output_dir = tmp_path / f"shard{index}"
+        dependencies = DependencyIndex()
+        pages = generate_site(
+            content,
+            template,
+            [BuildTarget("/", output_dir)],
+            (index, shard_count),
+            dependencies=dependencies,
+        )
+        dependencies.save(tmp_path / ".cache" / dependencies_name((index, shard_count)))
+        write_manifest(output_dir, (index, shard_count), "/", pages)
+        fragment_dirs.append(output_dir)
+    return fragment_dirs
+
+
+def test_merge_shards(tmp_path):
+    fragment_dirs = _build_shards(tmp_path, 3)
+    merge_shards(fragment_dirs, tmp_path / "site", "https://example.com")
+
+    for i in range(10):
+        assert (tmp_path / "site" / f"page{i}" / "index.html").exists()
+    assert not (tmp_path / "site" / MANIFEST_NAME).exists()
+    sitemap = (tmp_path / "site" / SITEMAP_NAME).read_text()
+    assert sitemap.count("<url>") == 10
+    assert "<loc>https://example.com/page0/</loc>" in sitemap
+
+
+def test_merge_shards_missing_shard(tmp_path):
+    fragment_dirs = _build_shards(tmp_path, 3)
+    with pytest.raises(ValueError):
+        merge_shards(fragment_dirs[:2], tmp_path / "site")
+
+
+def test_merge_shards_collision(tmp_path):
+    fragment_dirs = _build_shards(tmp_path, 2)
+    (fragment_dirs[1] / "index.css").write_text("body {}")
+    write_manifest(fragment_dirs[1], (1, 2), "/", [])
+    (fragment_dirs[0] / "index.css").write_text("body {}")
+    write_manifest(fragment_dirs[0], (0, 2), "/", [])
+    with pytest.raises(ValueError):
+        merge_shards(fragment_dirs, tmp_path / "site")
+
+
+def test_merge_shards_refuses_non_empty_output(tmp_path):
+    fragment_dirs = _build_shards(tmp_path, 2)
+    (tmp_path / "site").mkdir()
+    (tmp_path / "site" / "old.html").write_text("stale")
+    with pytest.raises(ValueError):
+        merge_shards(fragment_dirs, tmp_path / "site")
+
+
+def test_merge_dependencies(tmp_path):
+    fragment_dirs = _build_shards(tmp_path, 3)
+    cache_dir = tmp_path / ".cache"
+    assert merge_dependencies(fragment_dirs, tmp_path / "site", cache_dir)
+
+    index = DependencyIndex.load(cache_dir / dependencies_name(None))
+    assert len(index.inputs) == 10
+    page = (tmp_path / "content" / "page3" / "index.md").resolve()
+    assert index.affected([page]) == {
+        (tmp_path / "site" / "page3" / "index.html").resolve()
+    }
+
+
+def test_merge_dependencies_missing_shard_index(tmp_path):
+    fragment_dirs = _build_shards(tmp_path, 2)
+    (tmp_path / ".cache" / dependencies_name((1, 2))).unlink()
+    assert not merge_dependencies(fragment_dirs, tmp_path / "site", tmp_path / ".cache")
+    assert not (tmp_path / ".cache" / dependencies_name(None)).exists()
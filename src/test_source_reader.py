@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from block_markdown import markdown_to_blocks
+from render import render_content, render_source
+from source_reader import iter_blocks
+
+
+@pytest.mark.parametrize(
+    "markdown",
+    [
+        "# Title\n\nA paragraph\nover two lines\n\n- a list\n- of items\n",
+        "Hello, world!\n\n\n\n\nThis is a test.",
+        "trailing blocks\n\n\n\n",
+        "\n\nleading blocks",
+        "single line",
+        "# Ünïcödé\n\n— dashes — and ✓ marks",
+    ],
+)
+@pytest.mark.parametrize("threshold", [0, 1 << 20])
+def test_iter_blocks_matches_markdown_to_blocks(tmp_path, markdown, threshold):
+    path = tmp_path / "page.md"
+    path.write_text(markdown, encoding="utf-8")
+    assert list(iter_blocks(path, threshold)) == markdown_to_blocks(markdown)
+
+
+def test_iter_blocks_reads_utf8_in_any_locale(tmp_path):
+    (tmp_path / "page.md").write_text("# Ünïcödé\n\n✓", encoding="utf-8")
+    code = (
+        "import sys; from pathlib import Path; from source_reader import iter_blocks; "
+        "path = Path(sys.argv[1]); "
+        "assert list(iter_blocks(path)) == list(iter_blocks(path, 0)), 'differs'"
+    )
+    # an ASCII locale, where only UTF-8 mode would make open() default to UTF-8
+    subprocess.run(
+        [sys.executable, "-X", "utf8=0", "-c", code, tmp_path / "page.md"],
+        cwd=Path(__file__).parent,
+        env={**os.environ, "LC_ALL": "C", "PYTHONCOERCECLOCALE": "0"},
+        check=True,
+    )
+
+
+def test_iter_blocks_empty_file(tmp_path):
+    (tmp_path / "page.md").write_text("")
+    assert list(iter_blocks(tmp_path / "page.md", threshold=0)) == []
+
+
+def test_iter_blocks_crlf_falls_back_to_text_mode(tmp_path):
+    (tmp_path / "page.md").write_bytes(b"# Title\r\n\r\nBody\r\nmore")
+    assert list(iter_blocks(tmp_path / "page.md", threshold=0)) == [
+        "# Title",
+        "Body\nmore",
+    ]
+
+
+def test_render_source_matches_render_content(tmp_path):
+    markdown = "# Title\n\nSome **bold** text\n\n> a quote"
+    (tmp_path / "page.md").write_text(markdown)
+    assert render_source(tmp_path / "page.md") == render_content(markdown)
+
+
+def test_render_source_without_title(tmp_path):
+    (tmp_path / "page.md").write_text("No title here")
+    with pytest.raises(ValueError):
+        render_source(tmp_path / "page.md")